@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'GearGuard - Maintenance Tracker',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.4.0',
     'category': 'Maintenance',
     'summary': 'The Ultimate Maintenance Management System',
     'description': """
@@ -39,13 +39,21 @@
         # Data
         'data/maintenance_stage_data.xml',
         'data/equipment_category_data.xml',
+        'data/ir_cron_data.xml',
         
         # Views
         'views/equipment_category_views.xml',
+        'views/maintenance_location_views.xml',
         'views/equipment_views.xml',
+        'views/equipment_meter_views.xml',
         'views/maintenance_team_views.xml',
+        'views/maintenance_sla_views.xml',
         'views/work_center_views.xml',
+        'views/spare_part_views.xml',
         'views/maintenance_request_views.xml',
+        'views/maintenance_stage_transition_views.xml',
+        'views/maintenance_cost_forecast_views.xml',
+        'views/gearguard_job_views.xml',
         'views/menu_views.xml',
     ],
     'demo': [
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+import tempfile
+
+from odoo import api, fields, http
+from odoo.http import content_disposition, request, Response
+from odoo.tools.misc import xlsxwriter
+
+from ..tools import reporting_cursor
+
+# Size of the blocks streamed from the temporary XLSX file
+XLSX_STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class GearGuardExportController(http.Controller):
+    """Streaming CSV/XLSX export of requests and equipment history"""
+
+    @http.route('/gearguard/export/<string:model_name>', type='http', auth='user', methods=['GET'])
+    def export(self, model_name, domain='[]', format='csv'):
+        """Stream ``model_name`` rows matching ``domain`` as CSV or XLSX
+        
+        Rows are produced chunk by chunk on a dedicated cursor while the
+        response is being sent, so the worker never holds the whole export.
+        """
+        if model_name not in request.env or not getattr(request.env[model_name], '_gearguard_export_fields', None):
+            raise request.not_found()
+        request.env[model_name].check_access_rights('read')
+        domain = json.loads(domain)
+        export_format = 'xlsx' if format == 'xlsx' else 'csv'
+        
+        # The generators run after the request is done: capture what they need now
+        scope = (request.env.registry, request.env.uid, dict(request.env.context))
+        filename = f"{model_name.replace('.', '_')}_{fields.Date.today()}.{export_format}"
+        if export_format == 'xlsx':
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            body = self._stream_xlsx(scope, model_name, domain)
+        else:
+            content_type = 'text/csv;charset=utf-8'
+            body = self._stream_csv(scope, model_name, domain)
+        return Response(body, direct_passthrough=True, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+    
+    def _iter_chunks(self, scope, model_name, domain):
+        """Yield the header, then row chunks, reading on a dedicated cursor
+        
+        The request and its cursor are gone once the response starts
+        streaming, so ``scope`` (registry, uid, context) is captured by
+        export() and the generator opens its own cursor: on the reporting
+        replica when available, the primary being only used briefly to read
+        its settings, else on the primary.
+        """
+        registry, uid, context = scope
+        with registry.cursor() as settings_cr:
+            cr = reporting_cursor(api.Environment(settings_cr, uid, context))
+        if cr is None:
+            cr = registry.cursor()
+        try:
+            Model = api.Environment(cr, uid, dict(context, gearguard_no_replica=True))[model_name]
+            yield [Model._gearguard_export_header()]
+            yield from Model._gearguard_export_chunks(domain)
+        finally:
+            cr.close()
+    
+    def _stream_csv(self, scope, model_name, domain):
+        """Encode each chunk as CSV as soon as it is read"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for rows in self._iter_chunks(scope, model_name, domain):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    
+    def _stream_xlsx(self, scope, model_name, domain):
+        """Write rows in constant-memory mode to a temp file, then stream it"""
+        with tempfile.TemporaryFile() as tmp:
+            workbook = xlsxwriter.Workbook(tmp, {'constant_memory': True})
+            sheet = workbook.add_worksheet(model_name)
+            row_index = 0
+            for rows in self._iter_chunks(scope, model_name, domain):
+                for row in rows:
+                    sheet.write_row(row_index, 0, row)
+                    row_index += 1
+            workbook.close()
+            tmp.seek(0)
+            while True:
+                block = tmp.read(XLSX_STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.exceptions import UserError
+from odoo.http import request
+
+# Upper bound for events committed in a single transaction
+INGEST_MAX_CHUNK_SIZE = 2000
+
+
+class GearGuardController(http.Controller):
+    """HTTP endpoints for shop-floor devices (scanners, tablets)"""
+
+    @http.route('/gearguard/scan', type='json', auth='user', methods=['POST'])
+    def scan(self, code):
+        """Look up equipment by serial number / barcode
+        
+        Returns the equipment, its open requests and its default team,
+        or False if nothing matches.
+        """
+        return request.env['equipment.equipment'].get_scan_payload(code)
+
+    @http.route('/gearguard/ingest/faults', type='json', auth='user', methods=['POST'])
+    def ingest_faults(self, events, chunk_size=500, coalesce=True):
+        """Batch-ingest machine/IoT fault events as corrective requests
+        
+        Events are processed and committed in chunks so a fault storm never
+        holds one long transaction. Repeated faults on equipment with an open
+        corrective request are merged into it unless ``coalesce`` is false.
+        Returns one result per event.
+        """
+        if not isinstance(events, list):
+            raise UserError(_("'events' must be a list of fault events"))
+        chunk_size = max(1, min(int(chunk_size), INGEST_MAX_CHUNK_SIZE))
+        Request = request.env['maintenance.request']
+        results = []
+        for start in range(0, len(events), chunk_size):
+            chunk_results = Request.ingest_fault_events(events[start:start + chunk_size], coalesce=bool(coalesce))
+            for result in chunk_results:
+                result['index'] += start
+            results.extend(chunk_results)
+            request.env.cr.commit()
+            request.env.invalidate_all()
+        return {'results': results}
+
+    @http.route('/gearguard/ingest/meters', type='json', auth='user', methods=['POST'])
+    def ingest_meters(self, readings, chunk_size=INGEST_MAX_CHUNK_SIZE):
+        """Batch-ingest meter readings (running hours, cycles)
+        
+        Readings are stored and committed in chunks; thresholds crossed by a
+        chunk create their preventive requests in the same transaction.
+        """
+        if not isinstance(readings, list):
+            raise UserError(_("'readings' must be a list of meter readings"))
+        chunk_size = max(1, min(int(chunk_size), INGEST_MAX_CHUNK_SIZE))
+        Reading = request.env['equipment.meter.reading']
+        result = {'stored': 0, 'errors': [], 'request_ids': []}
+        for start in range(0, len(readings), chunk_size):
+            chunk_result = Reading.ingest_readings(readings[start:start + chunk_size])
+            result['stored'] += chunk_result['stored']
+            result['errors'].extend(
+                dict(error, index=error['index'] + start) for error in chunk_result['errors']
+            )
+            result['request_ids'].extend(chunk_result['request_ids'])
+            request.env.cr.commit()
+            request.env.invalidate_all()
+        return result
+
+    @http.route('/gearguard/sync/pull', type='json', auth='user', methods=['POST'])
+    def sync_pull(self, cursors=None, limit=500):
+        """Delta of the stages, equipment and requests held by the device"""
+        return request.env['gearguard.sync'].sync_pull(cursors=cursors, limit=limit)
+
+    @http.route('/gearguard/sync/push', type='json', auth='user', methods=['POST'])
+    def sync_push(self, changes):
+        """Apply edits made offline, reporting conflicts per change"""
+        if not isinstance(changes, list):
+            raise UserError(_("'changes' must be a list of record changes"))
+        return {'results': request.env['gearguard.sync'].sync_push(changes)}
+
+    @http.route('/gearguard/kpi', type='json', auth='user', methods=['POST'])
+    def kpi(self):
+        """Whole maintenance KPI bundle for wallboards, cached with a short TTL"""
+        return request.env['maintenance.dashboard'].get_kpis()
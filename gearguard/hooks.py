@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""Set-based backfill of stored computed fields
+
+When a stored computed field gets its column created by the ORM, every row is
+recomputed in Python. On large databases that means hours of downtime, so the
+upgrade scripts create these columns beforehand and fill them here with plain
+SQL, in id-range batches to keep locks and WAL volume bounded. The ORM then
+finds the columns already present and skips the recomputation.
+
+The stored field backfills only fill the columns they just created; a column
+that already existed is kept up to date by the ORM and left alone. Every
+statement only touches rows whose value actually changes.
+"""
+
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement
+BATCH_SIZE = 50000
+
+
+def _ensure_column(cr, table, column, column_type):
+    """Create ``column`` if missing; return whether it was created"""
+    if sql.column_exists(cr, table, column):
+        return False
+    sql.create_column(cr, table, column, column_type)
+    return True
+
+
+def _translated_name(cr, table, alias):
+    """SQL expression of a (possibly translated) name column, in en_US"""
+    cr.execute("""
+        SELECT data_type
+          FROM information_schema.columns
+         WHERE table_name = %s
+           AND column_name = 'name'
+    """, [table])
+    row = cr.fetchone()
+    if row and row[0] == 'jsonb':
+        return f"{alias}.name->>'en_US'"
+    return f"{alias}.name"
+
+
+def batched_update(cr, table, column, expression, joins='', where='TRUE'):
+    """Set ``column`` to ``expression`` on all rows, one id range at a time
+
+    ``expression`` and ``where`` may refer to the updated table as ``t`` and
+    to the relations added in ``joins`` (``LEFT JOIN`` clauses). Returns the
+    number of rows changed.
+    """
+    if not sql.table_exists(cr, table):
+        return 0
+    cr.execute(f'SELECT MIN(id), MAX(id) FROM "{table}"')
+    min_id, max_id = cr.fetchone()
+    if min_id is None:
+        return 0
+    changed = 0
+    for start in range(min_id, max_id + 1, BATCH_SIZE):
+        cr.execute(f"""
+            UPDATE "{table}" u
+               SET "{column}" = v.value
+              FROM (
+                    SELECT t.id, {expression} AS value
+                      FROM "{table}" t
+                    {joins}
+                     WHERE t.id >= %(start)s AND t.id < %(stop)s
+                       AND {where}
+                   ) v
+             WHERE u.id = v.id
+               AND u."{column}" IS DISTINCT FROM v.value
+        """, {'start': start, 'stop': start + BATCH_SIZE})
+        changed += cr.rowcount
+    _logger.info("GearGuard backfill: %s rows of %s.%s updated", changed, table, column)
+    return changed
+
+
+# -------------------------------------------------------------------------
+# MAINTENANCE REQUESTS
+# -------------------------------------------------------------------------
+
+def backfill_request_fields(cr):
+    """Stored computed fields of maintenance.request"""
+    table = 'maintenance_request'
+    if not sql.table_exists(cr, table):
+        return
+    created = {
+        column
+        for column, column_type in [
+            ('category_id', 'int4'),
+            ('reminder_date', 'date'),
+            ('is_closed', 'bool'),
+            ('is_overdue', 'bool'),
+            ('scheduled_end', 'timestamp'),
+            ('parts_cost', 'numeric'),
+        ]
+        if _ensure_column(cr, table, column, column_type)
+    }
+
+    if 'category_id' in created:
+        batched_update(
+            cr, table, 'category_id', 'e.category_id',
+            joins='LEFT JOIN equipment_equipment e ON e.id = t.equipment_id',
+        )
+    if 'reminder_date' in created:
+        batched_update(
+            cr, table, 'reminder_date', """
+                CASE WHEN t.scheduled_date IS NOT NULL AND COALESCE(t.reminder_days, 0) != 0
+                     THEN (t.scheduled_date - make_interval(days => t.reminder_days))::date
+                END
+            """,
+        )
+    if 'is_closed' in created:
+        batched_update(
+            cr, table, 'is_closed', 's.is_closed',
+            joins='LEFT JOIN maintenance_stage s ON s.id = t.stage_id',
+        )
+    if 'scheduled_end' in created:
+        batched_update(
+            cr, table, 'scheduled_end',
+            "t.scheduled_date + make_interval(secs => COALESCE(t.duration, 0) * 3600)",
+        )
+    if 'parts_cost' in created:
+        # No parts lines exist before the upgrade that introduces them
+        batched_update(cr, table, 'parts_cost', '0')
+    if 'is_overdue' in created:
+        refresh_request_overdue(cr)
+
+
+def refresh_request_overdue(cr):
+    """is_overdue as of today"""
+    batched_update(
+        cr, 'maintenance_request', 'is_overdue',
+        "COALESCE(t.deadline < CURRENT_DATE AND s.is_closed IS NOT TRUE, FALSE)",
+        joins='LEFT JOIN maintenance_stage s ON s.id = t.stage_id',
+    )
+
+
+def backfill_sla_breaches(cr):
+    """Per-target breach stamps from the former single sla_breached flag
+
+    A request flagged 'resolution' may have missed its response target too;
+    it is stamped whenever that target was passed, so that the watcher does
+    not escalate breaches it already reported.
+    """
+    table = 'maintenance_request'
+    if not sql.column_exists(cr, table, 'sla_breached'):
+        return
+    _ensure_column(cr, table, 'sla_response_breached_on', 'timestamp')
+    _ensure_column(cr, table, 'sla_resolution_breached_on', 'timestamp')
+    batched_update(
+        cr, table, 'sla_response_breached_on', 't.write_date',
+        where="""t.sla_breached = 'response'
+                 OR (t.sla_breached = 'resolution'
+                     AND t.sla_response_due < COALESCE(t.date_responded, t.write_date))""",
+    )
+    batched_update(
+        cr, table, 'sla_resolution_breached_on', 't.write_date',
+        where="t.sla_breached = 'resolution'",
+    )
+
+
+# -------------------------------------------------------------------------
+# EQUIPMENT
+# -------------------------------------------------------------------------
+
+def backfill_equipment_fields(cr):
+    """Stored computed fields of equipment.equipment"""
+    table = 'equipment_equipment'
+    if not sql.table_exists(cr, table):
+        return
+    if _ensure_column(cr, table, 'owner_display', 'varchar'):
+        batched_update(
+            cr, table, 'owner_display', f"""
+                CASE
+                    WHEN t.ownership_type = 'company' THEN 'Company'
+                    WHEN t.ownership_type = 'department' AND d.id IS NOT NULL THEN {_translated_name(cr, 'hr_department', 'd')}
+                    WHEN t.ownership_type = 'employee' AND emp.id IS NOT NULL THEN emp.name
+                    ELSE 'Not Assigned'
+                END
+            """,
+            joins="""
+                LEFT JOIN hr_department d ON d.id = t.department_id
+                LEFT JOIN hr_employee emp ON emp.id = t.employee_id
+            """,
+        )
+    if _ensure_column(cr, table, 'warranty_status', 'varchar'):
+        refresh_warranty_status(cr)
+
+
+def backfill_maintenance_dates(cr):
+    """next/last maintenance dates of equipment from their requests"""
+    if not sql.column_exists(cr, 'equipment_equipment', 'next_maintenance_date'):
+        return
+    dates = """
+        LEFT JOIN LATERAL (
+            SELECT MIN(r.scheduled_date) FILTER (WHERE r.is_closed IS NOT TRUE) AS next_date,
+                   MAX(r.close_date) FILTER (WHERE r.is_closed) AS last_date
+              FROM maintenance_request r
+             WHERE r.equipment_id = t.id
+               AND r.active
+        ) d ON TRUE
+    """
+    batched_update(cr, 'equipment_equipment', 'next_maintenance_date', 'd.next_date', joins=dates)
+    batched_update(cr, 'equipment_equipment', 'last_maintenance_date', 'd.last_date', joins=dates)
+
+
+def refresh_warranty_status(cr):
+    """warranty_status as of today"""
+    batched_update(
+        cr, 'equipment_equipment', 'warranty_status', """
+            CASE
+                WHEN t.warranty_expiry IS NULL THEN 'na'
+                WHEN t.warranty_expiry >= CURRENT_DATE THEN 'valid'
+                ELSE 'expired'
+            END
+        """,
+    )
+
+
+# -------------------------------------------------------------------------
+# WORK CENTERS
+# -------------------------------------------------------------------------
+
+def backfill_work_center_fields(cr):
+    """Stored computed fields of maintenance.work.center"""
+    table = 'maintenance_work_center'
+    if not sql.table_exists(cr, table):
+        return
+    if _ensure_column(cr, table, 'total_cost', 'float8'):
+        batched_update(
+            cr, table, 'total_cost',
+            "COALESCE(t.hourly_cost, 0) + COALESCE(t.capacity_cost, 0)",
+        )
+
+
+# -------------------------------------------------------------------------
+# LOCATIONS
+# -------------------------------------------------------------------------
+
+# Free-text location with trimmed, single-spaced words
+NORMALIZED_LOCATION = r"regexp_replace(btrim({column}), '\s+', ' ', 'g')"
+
+
+def prepare_location_columns(cr):
+    """Create the request location column so the ORM does not fill it row by row"""
+    if sql.table_exists(cr, 'maintenance_request'):
+        _ensure_column(cr, 'maintenance_request', 'location_id', 'int4')
+
+
+def backfill_locations(cr):
+    """Turn the free-text locations of equipment and work centers into records
+
+    Distinct strings (compared trimmed, single-spaced and case-insensitive)
+    become one top-level location each, inserted with a single statement;
+    the references are then set with id-range batches and the text columns
+    rewritten to the chosen spelling.
+    """
+    if not sql.table_exists(cr, 'maintenance_location'):
+        return
+    sources = ' UNION ALL '.join(
+        f"SELECT {NORMALIZED_LOCATION.format(column='location')} FROM {table} WHERE location IS NOT NULL"
+        for table in ('equipment_equipment', 'maintenance_work_center')
+        if sql.column_exists(cr, table, 'location')
+    )
+    if not sources:
+        return
+    cr.execute(f"""
+        INSERT INTO maintenance_location (name, complete_name, active, create_uid, create_date, write_uid, write_date)
+        SELECT DISTINCT ON (lower(s.name)) s.name, s.name, TRUE,
+               1, now() at time zone 'UTC', 1, now() at time zone 'UTC'
+          FROM ({sources}) AS s(name)
+         WHERE s.name != ''
+           AND NOT EXISTS (
+                SELECT 1 FROM maintenance_location l
+                 WHERE l.parent_id IS NULL
+                   AND lower(l.name) = lower(s.name)
+               )
+      ORDER BY lower(s.name), s.name
+    """)
+    _logger.info("GearGuard backfill: %s locations created", cr.rowcount)
+    cr.execute("UPDATE maintenance_location SET parent_path = id || '/' WHERE parent_path IS NULL")
+
+    matching_location = f"""
+        LEFT JOIN (
+            SELECT DISTINCT ON (lower(name)) id, lower(name) AS key
+              FROM maintenance_location
+             WHERE parent_id IS NULL
+          ORDER BY lower(name), id
+        ) l ON l.key = lower({NORMALIZED_LOCATION.format(column='t.location')})
+    """
+    for table in ('equipment_equipment', 'maintenance_work_center'):
+        if not sql.column_exists(cr, table, 'location_id'):
+            continue
+        batched_update(
+            cr, table, 'location_id', 'l.id', joins=matching_location,
+            where="t.location IS NOT NULL AND t.location_id IS NULL",
+        )
+        batched_update(
+            cr, table, 'location', 'l.complete_name',
+            joins='JOIN maintenance_location l ON l.id = t.location_id',
+        )
+    if sql.column_exists(cr, 'maintenance_request', 'location_id'):
+        batched_update(
+            cr, 'maintenance_request', 'location_id', 'e.location_id',
+            joins='LEFT JOIN equipment_equipment e ON e.id = t.equipment_id',
+        )
+
+
+def backfill_stored_fields(cr):
+    """Create and fill all stored computed columns, set-wise"""
+    backfill_equipment_fields(cr)
+    backfill_request_fields(cr)
+    backfill_work_center_fields(cr)
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Bring the date-dependent flags up to date once the upgrade is loaded"""
+    if not version:
+        return
+    hooks.refresh_request_overdue(cr)
+    hooks.refresh_warranty_status(cr)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Create and fill the stored computed columns before the ORM does it row by row"""
+    if not version:
+        return
+    hooks.backfill_stored_fields(cr)
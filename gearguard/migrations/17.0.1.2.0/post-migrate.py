@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Dedupe the free-text locations into the location tree"""
+    if not version:
+        return
+    hooks.backfill_locations(cr)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Create the stored request location column before the ORM fills it row by row"""
+    if not version:
+        return
+    hooks.prepare_location_columns(cr)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Fill the next/last maintenance dates of existing equipment"""
+    if not version:
+        return
+    hooks.backfill_maintenance_dates(cr)
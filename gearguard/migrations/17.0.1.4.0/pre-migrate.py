@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.gearguard import hooks
+
+
+def migrate(cr, version):
+    """Split the SLA breach flag into one stamp per target"""
+    if not version:
+        return
+    hooks.backfill_sla_breaches(cr)
@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
 
+from . import gearguard_export_mixin
+from . import gearguard_sync
+from . import gearguard_reporting_mixin
+from . import maintenance_location
 from . import equipment_category
 from . import equipment
+from . import equipment_meter
 from . import maintenance_team
 from . import maintenance_stage
+from . import maintenance_sla
 from . import maintenance_request
+from . import maintenance_stage_transition
+from . import maintenance_cost_forecast
+from . import spare_part
 from . import work_center
+from . import res_users
+from . import gearguard_job
+from . import gearguard_chatter_retention
+from . import maintenance_dashboard
@@ -1,7 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import logging
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import sql
+
+from ..tools import reliability
+
+_logger = logging.getLogger(__name__)
 
 
 class Equipment(models.Model):
@@ -12,8 +20,36 @@ class Equipment(models.Model):
     """
     _name = 'equipment.equipment'
     _description = 'Equipment'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'gearguard.export.mixin', 'gearguard.sync.mixin',
+                'gearguard.reporting.mixin', 'gearguard.location.mixin']
     _order = 'name'
+    _rec_names_search = ['name', 'serial_number']
+    _parent_name = 'parent_id'
+    _parent_store = True
+    
+    _gearguard_export_fields = [
+        ('id', 'ID'),
+        ('name', 'Equipment Name'),
+        ('serial_number', 'Serial Number'),
+        ('category_id.name', 'Category'),
+        ('owner_display', 'Owner'),
+        ('maintenance_team_id.name', 'Maintenance Team'),
+        ('technician_id.name', 'Default Technician'),
+        ('work_center_id.name', 'Work Center'),
+        ('location', 'Location'),
+        ('purchase_date', 'Purchase Date'),
+        ('purchase_value', 'Purchase Value'),
+        ('warranty_expiry', 'Warranty Expiry'),
+        ('warranty_status', 'Warranty Status'),
+        ('is_scrap', 'Scrapped'),
+        ('scrap_date', 'Scrap Date'),
+    ]
+    
+    _gearguard_sync_fields = [
+        'name', 'serial_number', 'category_id', 'parent_id', 'location_id', 'location',
+        'maintenance_team_id', 'technician_id', 'is_scrap',
+    ]
+    _gearguard_sync_scope_fields = ['active', 'technician_id', 'maintenance_team_id']
 
     # -------------------------------------------------------------------------
     # BASIC FIELDS
@@ -53,6 +89,32 @@ class Equipment(models.Model):
         string='Color Index'
     )
     
+    # -------------------------------------------------------------------------
+    # ASSET HIERARCHY (LINES, MACHINES, SUB-ASSEMBLIES)
+    # -------------------------------------------------------------------------
+    
+    parent_id = fields.Many2one(
+        'equipment.equipment',
+        string='Parent Equipment',
+        index=True,
+        ondelete='restrict',
+        tracking=True,
+        help="Line or machine this equipment is a component of"
+    )
+    
+    # Materialized path; also indexed with text_pattern_ops in init() for prefix scans
+    parent_path = fields.Char(
+        index=True,
+        unaccent=False
+    )
+    
+    child_ids = fields.One2many(
+        'equipment.equipment',
+        'parent_id',
+        string='Components',
+        help="Sub-assemblies and components of this equipment"
+    )
+    
     # -------------------------------------------------------------------------
     # CATEGORY & CLASSIFICATION
     # -------------------------------------------------------------------------
@@ -118,8 +180,9 @@ class Equipment(models.Model):
     )
     
     team_member_ids = fields.Many2many(
-        related='maintenance_team_id.member_ids',
+        'res.users',
         string='Team Members',
+        compute='_compute_team_member_ids',
         help="Members of the assigned maintenance team"
     )
     
@@ -154,6 +217,7 @@ class Equipment(models.Model):
     warranty_expiry = fields.Date(
         string='Warranty Expiry',
         tracking=True,
+        index=True,
         help="Date when warranty expires"
     )
     
@@ -163,6 +227,14 @@ class Equipment(models.Model):
         ('na', 'No Warranty'),
     ], string='Warranty Status', compute='_compute_warranty_status', store=True)
     
+    warranty_notice_level = fields.Integer(
+        string='Warranty Notice Sent',
+        readonly=True,
+        copy=False,
+        help="Shortest lead time (in days) for which a warranty expiry notice "
+             "was already sent; 0 when none. Reset when the expiry date changes."
+    )
+    
     vendor_id = fields.Many2one(
         'res.partner',
         string='Vendor',
@@ -170,13 +242,56 @@ class Equipment(models.Model):
     )
     
     # -------------------------------------------------------------------------
-    # LOCATION
+    # MAINTENANCE DATES (MAINTAINED BY THE REQUESTS)
     # -------------------------------------------------------------------------
     
-    location = fields.Char(
-        string='Location',
-        tracking=True,
-        help="Physical location of the equipment (e.g., Building A, Floor 2, Room 101)"
+    next_maintenance_date = fields.Datetime(
+        string='Next Maintenance',
+        readonly=True,
+        index=True,
+        copy=False,
+        help="Earliest scheduled date of the open requests of this equipment"
+    )
+    
+    last_maintenance_date = fields.Date(
+        string='Last Serviced',
+        readonly=True,
+        index=True,
+        copy=False,
+        help="Latest close date of the completed requests of this equipment"
+    )
+    
+    # -------------------------------------------------------------------------
+    # RELIABILITY (SCORED BY A SCHEDULED BATCH JOB)
+    # -------------------------------------------------------------------------
+    
+    failure_risk = fields.Float(
+        string='Failure Risk',
+        digits=(5, 4),
+        readonly=True,
+        index=True,
+        copy=False,
+        help="Predicted probability of a breakdown within the next 90 days, "
+             "from the corrective history of the asset and its category"
+    )
+    
+    mtbf_days = fields.Float(
+        string='MTBF (Days)',
+        digits=(16, 1),
+        readonly=True,
+        copy=False,
+        help="Estimated mean time between failures"
+    )
+    
+    # -------------------------------------------------------------------------
+    # METERS (RUNNING HOURS / CYCLES)
+    # -------------------------------------------------------------------------
+    
+    meter_threshold_ids = fields.One2many(
+        'equipment.meter.threshold',
+        'equipment_id',
+        string='Meter Thresholds',
+        help="Preventive maintenance triggered by running hours or cycle counts"
     )
     
     # -------------------------------------------------------------------------
@@ -217,6 +332,30 @@ class Equipment(models.Model):
         help="Number of open (not completed) maintenance requests"
     )
     
+    subtree_request_count = fields.Integer(
+        string='Requests (incl. Components)',
+        compute='_compute_subtree_rollups',
+        help="Maintenance requests on this equipment and all its components"
+    )
+    
+    subtree_open_request_count = fields.Integer(
+        string='Open Requests (incl. Components)',
+        compute='_compute_subtree_rollups'
+    )
+    
+    subtree_cost = fields.Float(
+        string='Maintenance Cost (incl. Components)',
+        compute='_compute_subtree_rollups',
+        digits='Product Price',
+        help="Actual maintenance cost rolled up over the whole subtree"
+    )
+    
+    subtree_downtime = fields.Float(
+        string='Downtime Hours (incl. Components)',
+        compute='_compute_subtree_rollups',
+        help="Maintenance duration rolled up over the whole subtree"
+    )
+    
     # -------------------------------------------------------------------------
     # SQL CONSTRAINTS (ORM Best Practice)
     # -------------------------------------------------------------------------
@@ -257,6 +396,14 @@ class Equipment(models.Model):
             else:
                 equipment.warranty_status = 'expired'
     
+    @api.depends('maintenance_team_id', 'maintenance_team_id.member_ids')
+    def _compute_team_member_ids(self):
+        """Team members from the cached membership map"""
+        Team = self.env['maintenance.team']
+        for equipment in self:
+            member_ids = Team._get_team_member_ids(equipment.maintenance_team_id.id)
+            equipment.team_member_ids = [(6, 0, sorted(member_ids))]
+    
     def _compute_request_count(self):
         """Compute number of maintenance requests for this equipment"""
         Request = self.env['maintenance.request']
@@ -269,6 +416,104 @@ class Equipment(models.Model):
                 ('stage_id.is_closed', '=', False)
             ])
     
+    def _compute_subtree_rollups(self):
+        """Roll request counts, cost and downtime up the asset tree
+        
+        One set-based aggregate for the whole recordset: each ancestor is
+        joined to its subtree through a prefix range on parent_path (served
+        by the text_pattern_ops index), then to the subtree's requests.
+        """
+        rollups = {}
+        if self.ids:
+            self.flush_model(['parent_path'])
+            self.env['maintenance.request'].flush_model(
+                ['equipment_id', 'active', 'is_closed', 'actual_cost', 'duration'])
+            self.env.cr.execute("""
+                SELECT anc.id,
+                       COUNT(r.id),
+                       COUNT(r.id) FILTER (WHERE r.is_closed IS NOT TRUE),
+                       COALESCE(SUM(r.actual_cost), 0),
+                       COALESCE(SUM(r.duration), 0)
+                  FROM equipment_equipment anc
+                  JOIN equipment_equipment e
+                    ON e.parent_path ~>=~ anc.parent_path
+                   AND e.parent_path ~<~ anc.parent_path || '~'
+                  JOIN maintenance_request r
+                    ON r.equipment_id = e.id
+                   AND r.active
+                 WHERE anc.id IN %s
+              GROUP BY anc.id
+            """, [tuple(self.ids)])
+            rollups = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for equipment in self:
+            count, open_count, cost, downtime = rollups.get(equipment.id, (0, 0, 0.0, 0.0))
+            equipment.subtree_request_count = count
+            equipment.subtree_open_request_count = open_count
+            equipment.subtree_cost = cost
+            equipment.subtree_downtime = downtime
+    
+    # -------------------------------------------------------------------------
+    # DATABASE INDEXES
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Prefix index on parent_path for subtree (child_of) scans"""
+        super().init()
+        sql.create_index(
+            self.env.cr, 'equipment_equipment_parent_path_prefix_index', self._table,
+            ['parent_path text_pattern_ops'],
+        )
+    
+    # -------------------------------------------------------------------------
+    # SEARCH METHODS
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _name_search(self, name, domain=None, operator='ilike', limit=None, order=None):
+        """Resolve an exact serial number first through its UNIQUE index,
+        then fall back to the regular name/serial search"""
+        if name and operator in ('ilike', '=', '=ilike'):
+            serial_query = self._search(
+                [('serial_number', '=', name.strip())] + list(domain or []),
+                limit=1, order=order,
+            )
+            if list(serial_query):
+                return serial_query
+        return super()._name_search(name, domain=domain, operator=operator, limit=limit, order=order)
+    
+    @api.model
+    def get_scan_payload(self, code):
+        """Barcode/serial scan: equipment, open requests and team in one call
+        
+        Returns False when no equipment matches the scanned code.
+        """
+        code = (code or '').strip()
+        if not code:
+            return False
+        equipment = self.search([('serial_number', '=', code)], limit=1)
+        if not equipment:
+            return False
+        open_requests = self.env['maintenance.request'].search_read(
+            [('equipment_id', '=', equipment.id), ('stage_id.is_closed', '=', False)],
+            ['name', 'request_type', 'priority', 'stage_id', 'technician_id',
+             'scheduled_date', 'deadline'],
+        )
+        team = equipment.maintenance_team_id
+        return {
+            'id': equipment.id,
+            'name': equipment.name,
+            'serial_number': equipment.serial_number,
+            'category': equipment.category_id.name,
+            'location': equipment.location or False,
+            'is_scrap': equipment.is_scrap,
+            'maintenance_team': {'id': team.id, 'name': team.name} if team else False,
+            'technician': {
+                'id': equipment.technician_id.id,
+                'name': equipment.technician_id.name,
+            } if equipment.technician_id else False,
+            'open_requests': open_requests,
+        }
+    
     # -------------------------------------------------------------------------
     # ONCHANGE METHODS
     # -------------------------------------------------------------------------
@@ -288,13 +533,20 @@ class Equipment(models.Model):
     def _onchange_maintenance_team_id(self):
         """Reset technician when team changes"""
         if self.technician_id and self.maintenance_team_id:
-            if self.technician_id not in self.maintenance_team_id.member_ids:
+            member_ids = self.env['maintenance.team']._get_team_member_ids(self.maintenance_team_id.id)
+            if self.technician_id.id not in member_ids:
                 self.technician_id = False
     
     # -------------------------------------------------------------------------
     # CONSTRAINT METHODS
     # -------------------------------------------------------------------------
     
+    @api.constrains('parent_id')
+    def _check_parent_recursion(self):
+        """Prevent cycles in the asset tree"""
+        if not self._check_recursion():
+            raise ValidationError("An equipment cannot be a component of itself or of its own components.")
+    
     @api.constrains('ownership_type', 'department_id', 'employee_id')
     def _check_ownership(self):
         """Ensure ownership is properly set based on type"""
@@ -305,6 +557,236 @@ class Equipment(models.Model):
             if equipment.ownership_type == 'employee' and not equipment.employee_id:
                 raise ValidationError("Please select an employee for employee-owned equipment.")
     
+    # -------------------------------------------------------------------------
+    # CRUD OVERRIDES
+    # -------------------------------------------------------------------------
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Invalidate the KPI dashboard cache"""
+        self.env['maintenance.dashboard']._invalidate_cache()
+        return super().create(vals_list)
+    
+    def write(self, vals):
+        """Invalidate the KPI dashboard cache"""
+        self.env['maintenance.dashboard']._invalidate_cache()
+        # A new expiry date restarts the warranty notices
+        if 'warranty_expiry' in vals and 'warranty_notice_level' not in vals:
+            vals = dict(vals, warranty_notice_level=0)
+        # Archived equipment is no longer scored: drop its last risk score
+        if 'active' in vals and not vals['active']:
+            vals = dict(vals, failure_risk=0.0, mtbf_days=0.0)
+        return super().write(vals)
+    
+    def unlink(self):
+        """Invalidate the KPI dashboard cache"""
+        self.env['maintenance.dashboard']._invalidate_cache()
+        return super().unlink()
+    
+    # -------------------------------------------------------------------------
+    # WARRANTY WATCHER
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _get_warranty_lead_days(self):
+        """Notice lead times in days, shortest first (param gearguard.warranty_lead_days)"""
+        param = self.env['ir.config_parameter'].sudo().get_param('gearguard.warranty_lead_days', '90,30,7')
+        lead_days = set()
+        for value in param.split(','):
+            try:
+                days = int(value)
+            except ValueError:
+                _logger.warning("Ignoring invalid warranty lead time %r", value)
+                continue
+            if days > 0:
+                lead_days.add(days)
+        return sorted(lead_days)
+    
+    def _get_warranty_notice_user(self):
+        """User responsible for acting on a warranty notice"""
+        self.ensure_one()
+        return (
+            self.employee_id.user_id
+            or self.department_id.manager_id.user_id
+            or self.technician_id
+            or self.maintenance_team_id.team_leader_id
+            or self.env.user
+        )
+    
+    @api.model
+    def _refresh_warranty_status(self):
+        """Roll warranty_status over for expired warranties, set-wise"""
+        self.flush_model(['warranty_expiry', 'warranty_status'])
+        self.env.cr.execute("""
+            UPDATE equipment_equipment
+               SET warranty_status = 'expired'
+             WHERE warranty_expiry < %s
+               AND warranty_status IS DISTINCT FROM 'expired'
+         RETURNING id
+        """, [fields.Date.context_today(self)])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        if ids:
+            self.browse(ids).invalidate_recordset(['warranty_status'])
+    
+    @api.model
+    def _cron_warranty_watch(self, batch_size=1000):
+        """Send warranty expiry notices as scheduled activities
+        
+        For every lead time, the equipment expiring inside the window is read
+        through the warranty_expiry index. Equipment already notified for that
+        lead time (or a shorter one) is skipped, so every asset gets at most
+        one notice per lead time and daily runs only touch new candidates.
+        Lead times are handled shortest first, so equipment found late only
+        gets the most urgent notice.
+        """
+        self._refresh_warranty_status()
+        self.env.cr.commit()
+        
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        if not activity_type:
+            return
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        today = fields.Date.context_today(self)
+        for lead in self._get_warranty_lead_days():
+            domain = [
+                ('warranty_expiry', '>=', today),
+                ('warranty_expiry', '<=', today + timedelta(days=lead)),
+                '|', ('warranty_notice_level', '=', 0), ('warranty_notice_level', '>', lead),
+            ]
+            while True:
+                equipment = self.search(domain, order='warranty_expiry, id', limit=batch_size)
+                if not equipment:
+                    break
+                self.env['mail.activity'].create([{
+                    'activity_type_id': activity_type.id,
+                    'res_model_id': res_model_id,
+                    'res_id': asset.id,
+                    'user_id': asset._get_warranty_notice_user().id,
+                    'summary': _("Warranty expires on %(date)s", date=asset.warranty_expiry),
+                    'date_deadline': asset.warranty_expiry,
+                } for asset in equipment])
+                equipment.write({'warranty_notice_level': lead})
+                self.env.cr.commit()
+                self.env.invalidate_all()
+    
+    # -------------------------------------------------------------------------
+    # MAINTENANCE DATES
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _refresh_maintenance_dates(self, equipment_ids):
+        """Recompute next/last maintenance dates of the given equipment
+        
+        Called by the requests after each batch create/write/unlink with the
+        equipment they touched: one aggregate over their requests (through
+        the equipment_id index), and only rows whose dates change are updated.
+        """
+        equipment_ids = tuple({eid for eid in equipment_ids if eid})
+        if not equipment_ids:
+            return
+        self.env['maintenance.request'].flush_model(
+            ['equipment_id', 'scheduled_date', 'close_date', 'is_closed', 'active'])
+        self.env.cr.execute("""
+            UPDATE equipment_equipment e
+               SET next_maintenance_date = v.next_date,
+                   last_maintenance_date = v.last_date
+              FROM (
+                  SELECT q.id,
+                         MIN(r.scheduled_date) FILTER (WHERE r.is_closed IS NOT TRUE) AS next_date,
+                         MAX(r.close_date) FILTER (WHERE r.is_closed) AS last_date
+                    FROM equipment_equipment q
+               LEFT JOIN maintenance_request r
+                      ON r.equipment_id = q.id
+                     AND r.active
+                   WHERE q.id IN %s
+                GROUP BY q.id
+              ) v
+             WHERE e.id = v.id
+               AND (e.next_maintenance_date IS DISTINCT FROM v.next_date
+                    OR e.last_maintenance_date IS DISTINCT FROM v.last_date)
+         RETURNING e.id
+        """, [equipment_ids])
+        changed_ids = [row[0] for row in self.env.cr.fetchall()]
+        if changed_ids:
+            self.browse(changed_ids).invalidate_recordset(['next_maintenance_date', 'last_maintenance_date'])
+    
+    # -------------------------------------------------------------------------
+    # FAILURE RISK SCORING
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _cron_compute_failure_risk(self, horizon_days=90, batch_size=20000):
+        """Score the failure risk of all equipment in one vectorized pass
+        
+        Per-asset history is aggregated in SQL, scored with NumPy (see
+        tools.reliability) and written back with one UPDATE per batch that
+        only touches rows whose score changed. Failures are the active
+        corrective requests, each counting every occurrence merged into it.
+        Archived equipment is not scored; its score is reset when archived.
+        """
+        np = reliability.np
+        if np is None:
+            _logger.warning("Skipping failure-risk scoring: numpy is not installed")
+            return
+        self.flush_model(['category_id', 'purchase_date', 'warranty_expiry', 'is_scrap'])
+        self.env['maintenance.request'].flush_model(['equipment_id', 'request_type', 'occurrence_count', 'active'])
+        self.env.cr.execute("""
+            SELECT e.id,
+                   COALESCE(e.category_id, 0),
+                   %(today)s - COALESCE(e.purchase_date, e.create_date::date),
+                   COALESCE(e.warranty_expiry >= %(today)s, FALSE),
+                   COALESCE(e.is_scrap, FALSE),
+                   COALESCE(SUM(COALESCE(r.occurrence_count, 1)), 0)
+              FROM equipment_equipment e
+         LEFT JOIN maintenance_request r
+                ON r.equipment_id = e.id
+               AND r.request_type = 'corrective'
+               AND r.active
+             WHERE e.active
+          GROUP BY e.id
+        """, {'today': fields.Date.context_today(self)})
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return
+        ids, category_ids, exposure, under_warranty, is_scrap, failures = zip(*rows)
+        _categories, category_idx = np.unique(np.asarray(category_ids), return_inverse=True)
+        risk, mtbf = reliability.score_failure_risk(
+            category_idx, failures, exposure, under_warranty, horizon_days=horizon_days,
+        )
+        risk = np.where(np.asarray(is_scrap, dtype=bool), 0.0, risk).round(4)
+        mtbf = mtbf.round(1)
+        
+        for start in range(0, len(ids), batch_size):
+            stop = start + batch_size
+            self.env.cr.execute("""
+                UPDATE equipment_equipment e
+                   SET failure_risk = v.risk,
+                       mtbf_days = v.mtbf
+                  FROM unnest(%s::int[], %s::float8[], %s::float8[]) AS v(id, risk, mtbf)
+                 WHERE e.id = v.id
+                   AND (e.failure_risk IS DISTINCT FROM v.risk
+                        OR e.mtbf_days IS DISTINCT FROM v.mtbf)
+            """, [list(ids[start:stop]), risk[start:stop].tolist(), mtbf[start:stop].tolist()])
+        self.invalidate_model(['failure_risk', 'mtbf_days'])
+    
+    # -------------------------------------------------------------------------
+    # OFFLINE SYNC
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _gearguard_sync_domain(self):
+        """Equipment maintained by the user or by one of the user's teams"""
+        my_team_ids = list(self.env['maintenance.team']._get_user_team_ids(self.env.uid))
+        return ['|', ('technician_id', '=', self.env.uid), ('maintenance_team_id', 'in', my_team_ids)]
+    
+    def _gearguard_sync_holders(self):
+        """Active equipment is held through its technician and its team"""
+        return {
+            equipment.id: (equipment.technician_id.id, equipment.maintenance_team_id.id)
+            for equipment in self
+            if equipment.active and (equipment.technician_id or equipment.maintenance_team_id)
+        }
+    
     # -------------------------------------------------------------------------
     # SMART BUTTON ACTIONS
     # -------------------------------------------------------------------------
@@ -325,6 +807,30 @@ class Equipment(models.Model):
             },
         }
     
+    def action_view_meter_readings(self):
+        """Smart Button: Open the meter readings of this equipment"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Meter Readings - {self.name}',
+            'res_model': 'equipment.meter.reading',
+            'view_mode': 'tree,graph',
+            'domain': [('equipment_id', '=', self.id)],
+            'context': {'default_equipment_id': self.id},
+        }
+    
+    def action_view_subtree_requests(self):
+        """Smart Button: Open requests on this equipment and all its components"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Maintenance - {self.name} (incl. Components)',
+            'res_model': 'maintenance.request',
+            'view_mode': 'tree,kanban,form,calendar',
+            'domain': [('equipment_id', 'child_of', self.id)],
+            'context': {'default_equipment_id': self.id},
+        }
+    
     def action_create_request(self):
         """Quick action: Create new maintenance request for this equipment"""
         self.ensure_one()
@@ -340,6 +846,29 @@ class Equipment(models.Model):
             },
         }
     
+    def _apply_request_stage(self, scrap_request=False):
+        """Job: equipment side effects of a maintenance request stage move
+        
+        Scraps the equipment not scrapped yet when ``scrap_request`` (the
+        name of the request moved to a scrap stage) is given, then refreshes
+        the maintenance dates. Run from the job queue, so parallel kanban
+        moves never write the shared equipment rows themselves.
+        """
+        if scrap_request:
+            to_scrap = self.filtered(lambda equipment: not equipment.is_scrap)
+            if to_scrap:
+                to_scrap.write({
+                    'is_scrap': True,
+                    'scrap_date': fields.Date.today(),
+                    'scrap_reason': f"Scrapped via maintenance request: {scrap_request}",
+                })
+                for equipment in to_scrap:
+                    equipment.message_post(
+                        body=f"⚠️ Equipment marked as SCRAP based on maintenance request: {scrap_request}",
+                        message_type='notification',
+                    )
+        self._refresh_maintenance_dates(self.ids)
+    
     def action_scrap_equipment(self):
         """Mark equipment as scrapped"""
         self.ensure_one()
@@ -348,8 +877,9 @@ class Equipment(models.Model):
             'scrap_date': fields.Date.today(),
             'active': False,
         })
-        self.message_post(
+        self.env['gearguard.job']._enqueue(
+            self, 'message_post',
             body="Equipment has been marked as SCRAPPED and is no longer usable.",
-            message_type='notification'
+            message_type='notification',
         )
         return True
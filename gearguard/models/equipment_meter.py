@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import sql
+
+METER_TYPES = [
+    ('hours', 'Running Hours'),
+    ('cycles', 'Cycles'),
+]
+
+
+class EquipmentMeterReading(models.Model):
+    """Equipment Meter Reading
+    
+    Append-only time series of cumulative meter values (running hours,
+    cycle counts). Rows carry no audit columns and are indexed on
+    (equipment, meter, timestamp) only, to stay compact at high volume.
+    """
+    _name = 'equipment.meter.reading'
+    _description = 'Equipment Meter Reading'
+    _order = 'timestamp desc, id desc'
+    _log_access = False
+    
+    equipment_id = fields.Many2one(
+        'equipment.equipment',
+        string='Equipment',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    meter_type = fields.Selection(
+        METER_TYPES,
+        string='Meter',
+        required=True,
+        default='hours'
+    )
+    
+    value = fields.Float(
+        string='Value',
+        required=True,
+        help="Cumulative meter value at the time of the reading"
+    )
+    
+    timestamp = fields.Datetime(
+        string='Timestamp',
+        required=True,
+        default=fields.Datetime.now
+    )
+    
+    # -------------------------------------------------------------------------
+    # DATABASE INDEXES
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Composite index serving both history lookups and latest-value probes"""
+        super().init()
+        sql.create_index(
+            self.env.cr, 'equipment_meter_reading_equipment_meter_timestamp_index', self._table,
+            ['equipment_id', 'meter_type', 'timestamp'],
+        )
+    
+    # -------------------------------------------------------------------------
+    # CRUD OVERRIDES
+    # -------------------------------------------------------------------------
+    
+    def write(self, vals):
+        """Readings are append-only"""
+        raise UserError(_("Meter readings cannot be modified; record a new reading instead."))
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Evaluate the thresholds touched by the new readings"""
+        readings = super().create(vals_list)
+        if not self.env.context.get('gearguard_skip_meter_evaluation'):
+            self.env['equipment.meter.threshold']._evaluate_readings(readings)
+        return readings
+    
+    # -------------------------------------------------------------------------
+    # INGESTION
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _get_latest_values(self, pairs):
+        """Return {(equipment id, meter type): latest value} for the given pairs"""
+        if not pairs:
+            return {}
+        self.flush_model()
+        equipment_ids, meter_types = zip(*pairs)
+        self.env.cr.execute("""
+            SELECT p.equipment_id, p.meter_type, r.value
+              FROM unnest(%s::int[], %s::varchar[]) AS p(equipment_id, meter_type)
+              JOIN LATERAL (
+                    SELECT value
+                      FROM equipment_meter_reading
+                     WHERE equipment_id = p.equipment_id
+                       AND meter_type = p.meter_type
+                  ORDER BY timestamp DESC, id DESC
+                     LIMIT 1
+                   ) r ON TRUE
+        """, [list(equipment_ids), list(meter_types)])
+        return {(equipment_id, meter_type): value for equipment_id, meter_type, value in self.env.cr.fetchall()}
+    
+    @api.model
+    def ingest_readings(self, readings):
+        """Record a batch of meter readings from devices
+        
+        Each reading is a dict keyed by equipment ``serial`` with ``value``
+        and optional ``meter`` (hours/cycles, default hours) and
+        ``timestamp``. Equipment is resolved with a single query and the
+        readings are inserted with one batched create, which evaluates the
+        thresholds of the touched meters only. Returns the number of readings
+        stored, the invalid readings by index, and the preventive requests
+        created.
+        """
+        serials = {reading.get('serial') for reading in readings if reading.get('serial')}
+        equipment_by_serial = {
+            equipment.serial_number: equipment.id
+            for equipment in self.env['equipment.equipment'].search([('serial_number', 'in', list(serials))])
+        }
+        meter_types = dict(METER_TYPES)
+        
+        vals_list = []
+        errors = []
+        for index, reading in enumerate(readings):
+            equipment_id = equipment_by_serial.get(reading.get('serial'))
+            meter_type = reading.get('meter') or 'hours'
+            if not equipment_id:
+                errors.append({'index': index, 'error': _("Unknown equipment serial: %s", reading.get('serial'))})
+                continue
+            if meter_type not in meter_types:
+                errors.append({'index': index, 'error': _("Unknown meter: %s", meter_type)})
+                continue
+            try:
+                vals_list.append({
+                    'equipment_id': equipment_id,
+                    'meter_type': meter_type,
+                    'value': float(reading['value']),
+                    'timestamp': fields.Datetime.to_datetime(reading.get('timestamp')) or fields.Datetime.now(),
+                })
+            except (KeyError, TypeError, ValueError):
+                errors.append({'index': index, 'error': _("Invalid value or timestamp")})
+        
+        new_readings = self.with_context(gearguard_skip_meter_evaluation=True).create(vals_list)
+        requests = self.env['equipment.meter.threshold']._evaluate_readings(new_readings)
+        return {
+            'stored': len(new_readings),
+            'errors': errors,
+            'request_ids': requests.ids,
+        }
+
+
+class EquipmentMeterThreshold(models.Model):
+    """Meter-based Preventive Maintenance Threshold
+    
+    Creates a preventive request each time the equipment's meter advances
+    by ``interval`` since the value that last triggered it.
+    """
+    _name = 'equipment.meter.threshold'
+    _description = 'Equipment Meter Threshold'
+    _order = 'equipment_id, meter_type, interval'
+    
+    name = fields.Char(
+        string='Maintenance Task',
+        required=True,
+        help="Title of the preventive requests created (e.g., 500h oil change)"
+    )
+    
+    active = fields.Boolean(
+        string='Active',
+        default=True
+    )
+    
+    equipment_id = fields.Many2one(
+        'equipment.equipment',
+        string='Equipment',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    
+    meter_type = fields.Selection(
+        METER_TYPES,
+        string='Meter',
+        required=True,
+        default='hours'
+    )
+    
+    interval = fields.Float(
+        string='Every',
+        required=True,
+        help="Meter advance (hours or cycles) between two preventive requests"
+    )
+    
+    last_triggered_value = fields.Float(
+        string='Last Triggered At',
+        help="Meter value at which the last request was created. "
+             "Defaults to the latest reading when the threshold is created."
+    )
+    
+    next_value = fields.Float(
+        string='Next Due At',
+        compute='_compute_next_value'
+    )
+    
+    request_id = fields.Many2one(
+        'maintenance.request',
+        string='Last Request',
+        readonly=True,
+        ondelete='set null'
+    )
+    
+    _sql_constraints = [
+        ('interval_positive', 'CHECK(interval > 0)', 'The threshold interval must be positive!'),
+    ]
+    
+    @api.depends('last_triggered_value', 'interval')
+    def _compute_next_value(self):
+        """Meter value at which the next request is due"""
+        for threshold in self:
+            threshold.next_value = threshold.last_triggered_value + threshold.interval
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Start counting from the latest reading"""
+        pending = [
+            vals for vals in vals_list
+            if 'last_triggered_value' not in vals and vals.get('equipment_id')
+        ]
+        latest = self.env['equipment.meter.reading']._get_latest_values({
+            (vals['equipment_id'], vals.get('meter_type') or 'hours') for vals in pending
+        })
+        for vals in pending:
+            vals['last_triggered_value'] = latest.get((vals['equipment_id'], vals.get('meter_type') or 'hours'), 0.0)
+        return super().create(vals_list)
+    
+    @api.model
+    def _evaluate_readings(self, readings):
+        """Create the preventive requests due after new readings
+        
+        Only thresholds on the meters present in ``readings`` are looked at,
+        compared against the highest new value of their meter. The thresholds
+        are locked in id order so concurrent ingestions of the same meter
+        never create a request twice. No new request is created while the
+        previous one is still open; the threshold still moves forward.
+        Returns the requests created.
+        """
+        Request = self.env['maintenance.request']
+        max_values = {}
+        for reading in readings:
+            key = (reading.equipment_id.id, reading.meter_type)
+            max_values[key] = max(max_values.get(key, reading.value), reading.value)
+        if not max_values:
+            return Request
+        
+        thresholds = self.search([('equipment_id', 'in', list({key[0] for key in max_values}))])
+        thresholds = thresholds.filtered(lambda t: (t.equipment_id.id, t.meter_type) in max_values)
+        if not thresholds:
+            return Request
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id FROM equipment_meter_threshold
+             WHERE id IN %s
+          ORDER BY id
+               FOR NO KEY UPDATE
+        """, [tuple(thresholds.ids)])
+        thresholds.invalidate_recordset(['last_triggered_value', 'request_id'])
+        
+        due = []
+        for threshold in thresholds:
+            value = max_values[(threshold.equipment_id.id, threshold.meter_type)]
+            steps = math.floor((value - threshold.last_triggered_value) / threshold.interval)
+            if steps >= 1:
+                due.append((threshold, value, threshold.last_triggered_value + steps * threshold.interval))
+        if not due:
+            return Request
+        
+        to_request = [
+            (threshold, value) for threshold, value, __ in due
+            if not threshold.request_id or threshold.request_id.is_closed
+        ]
+        meter_labels = dict(METER_TYPES)
+        requests = Request.create([{
+            'name': threshold.name,
+            'equipment_id': threshold.equipment_id.id,
+            'request_type': 'preventive',
+            'description': _(
+                "Triggered by %(meter)s reaching %(value)s",
+                meter=meter_labels[threshold.meter_type], value=value,
+            ),
+        } for threshold, value in to_request])
+        request_by_threshold = {threshold.id: request.id for (threshold, __), request in zip(to_request, requests)}
+        for threshold, __, triggered_value in due:
+            vals = {'last_triggered_value': triggered_value}
+            if threshold.id in request_by_threshold:
+                vals['request_id'] = request_by_threshold[threshold.id]
+            threshold.write(vals)
+        return requests
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from markupsafe import Markup, escape
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+# Compacted models, with the tracked fields whose history is always kept
+# (workflow and scrap events stay visible message by message)
+RETENTION_MODELS = {
+    'equipment.equipment': ['is_scrap', 'scrap_date', 'scrap_reason'],
+    'maintenance.request': ['stage_id'],
+}
+
+# Tracking history older than this is compacted when the parameter is unset
+DEFAULT_RETENTION_DAYS = 365
+
+
+class GearGuardChatterRetention(models.AbstractModel):
+    """Chatter Retention for Equipment and Requests
+    
+    Tracking-only messages older than ``gearguard.chatter_retention_days``
+    are folded into one summary note per record (first and last value of
+    every field over the period) and deleted with their tracking values.
+    Messages carrying text, attachments, or a change of a kept field are
+    never touched. Read notifications of old messages are dropped as well.
+    """
+    _name = 'gearguard.chatter.retention'
+    _description = 'GearGuard Chatter Retention'
+    
+    @api.model
+    def _get_retention_cutoff(self):
+        """Oldest date kept as is, or None when retention is disabled"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'gearguard.chatter_retention_days', DEFAULT_RETENTION_DAYS,
+        ))
+        if days <= 0:
+            return None
+        return fields.Datetime.now() - timedelta(days=days)
+    
+    # -------------------------------------------------------------------------
+    # TRACKING COMPACTION
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _next_compaction_batch(self, model_name, cutoff, after_id, batch_size):
+        """Records past ``after_id`` holding at least two compactable messages"""
+        self.env.cr.execute("""
+            SELECT m.res_id
+              FROM mail_message m
+             WHERE m.model = %(model)s
+               AND m.res_id > %(after)s
+               AND m.date < %(cutoff)s
+               AND m.message_type = 'notification'
+               AND COALESCE(m.body, '') = ''
+               AND EXISTS (SELECT 1 FROM mail_tracking_value v WHERE v.mail_message_id = m.id)
+          GROUP BY m.res_id
+            HAVING COUNT(*) > 1
+          ORDER BY m.res_id
+             LIMIT %(limit)s
+        """, {'model': model_name, 'after': after_id, 'cutoff': cutoff, 'limit': batch_size})
+        return [row[0] for row in self.env.cr.fetchall()]
+    
+    @api.model
+    def _lock_compactable_messages(self, model_name, res_ids, cutoff, keep_fields):
+        """Lock and return {res_id: [message ids]} of the messages to fold
+        
+        Rows locked by a running transaction are skipped rather than waited
+        for; they are picked up by the next run.
+        """
+        self.env.cr.execute("""
+            SELECT m.res_id, m.id
+              FROM mail_message m
+             WHERE m.model = %(model)s
+               AND m.res_id = ANY(%(res_ids)s)
+               AND m.date < %(cutoff)s
+               AND m.message_type = 'notification'
+               AND COALESCE(m.body, '') = ''
+               AND EXISTS (SELECT 1 FROM mail_tracking_value v WHERE v.mail_message_id = m.id)
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM mail_tracking_value v
+                      JOIN ir_model_fields f ON f.id = v.field_id
+                     WHERE v.mail_message_id = m.id
+                       AND f.name = ANY(%(keep)s)
+                   )
+               AND NOT EXISTS (
+                    SELECT 1 FROM message_attachment_rel a WHERE a.message_id = m.id
+                   )
+          ORDER BY m.res_id, m.date, m.id
+               FOR UPDATE OF m SKIP LOCKED
+        """, {'model': model_name, 'res_ids': res_ids, 'cutoff': cutoff, 'keep': keep_fields})
+        messages = {}
+        for res_id, message_id in self.env.cr.fetchall():
+            messages.setdefault(res_id, []).append(message_id)
+        return {res_id: ids for res_id, ids in messages.items() if len(ids) > 1}
+    
+    @api.model
+    def _summarize_tracking(self, messages):
+        """HTML summary of the tracking values of ``messages`` (oldest first)"""
+        changes = {}
+        for message in messages:
+            for tracking in message.sudo().tracking_value_ids:
+                label = tracking.field_id.field_description or tracking.field_id.name
+                old_value = tracking._get_display_value('old')[0]
+                new_value = tracking._get_display_value('new')[0]
+                if label in changes:
+                    changes[label][1] = new_value
+                    changes[label][2] += 1
+                else:
+                    changes[label] = [old_value, new_value, 1]
+        header = _(
+            "%(count)s tracked changes from %(start)s to %(end)s (compacted)",
+            count=len(messages),
+            start=fields.Date.to_string(messages[0].date),
+            end=fields.Date.to_string(messages[-1].date),
+        )
+        lines = Markup('').join(
+            Markup('<li>%s: %s &#8594; %s (%s)</li>') % (
+                label, old_value or '', new_value or '', count,
+            )
+            for label, (old_value, new_value, count) in changes.items()
+        )
+        return Markup('<p>%s</p><ul>%s</ul>') % (escape(header), lines)
+    
+    @api.model
+    def _compact_model(self, model_name, cutoff, batch_size):
+        """Fold the old tracking messages of one model, a batch of records at a time"""
+        Model = self.env[model_name]
+        Message = self.env['mail.message'].sudo()
+        author_id = self.env.ref('base.partner_root').id
+        keep_fields = RETENTION_MODELS[model_name]
+        compacted = 0
+        after_id = 0
+        while True:
+            res_ids = self._next_compaction_batch(model_name, cutoff, after_id, batch_size)
+            if not res_ids:
+                break
+            after_id = res_ids[-1]
+            to_fold = self._lock_compactable_messages(model_name, res_ids, cutoff, keep_fields)
+            records = Model.browse(sorted(to_fold)).exists()
+            if records:
+                bodies = {}
+                dates = {}
+                for record in records:
+                    messages = Message.browse(to_fold[record.id]).sorted(lambda m: (m.date, m.id))
+                    bodies[record.id] = self._summarize_tracking(messages)
+                    dates[record.id] = messages[-1].date
+                summaries = records.with_context(mail_notrack=True)._message_log_batch(
+                    bodies, author_id=author_id,
+                )
+                summaries.flush_recordset()
+                # Keep the summaries where the compacted history was
+                self.env.cr.execute("""
+                    UPDATE mail_message m
+                       SET date = v.date
+                      FROM unnest(%s::int[], %s::timestamp[]) AS v(id, date)
+                     WHERE m.id = v.id
+                """, [summaries.ids, [dates[summary.res_id] for summary in summaries]])
+                # Tracking values and notifications go with their message
+                message_ids = [message_id for record in records for message_id in to_fold[record.id]]
+                self.env.cr.execute("DELETE FROM mail_message WHERE id = ANY(%s)", [message_ids])
+                compacted += len(message_ids)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+        return compacted
+    
+    # -------------------------------------------------------------------------
+    # NOTIFICATIONS
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _purge_read_notifications(self, cutoff, batch_size):
+        """Delete read, delivered notifications of old messages, batch by batch"""
+        purged = 0
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM mail_notification
+                 WHERE id IN (
+                        SELECT n.id
+                          FROM mail_notification n
+                          JOIN mail_message m ON m.id = n.mail_message_id
+                         WHERE m.model = ANY(%s)
+                           AND m.date < %s
+                           AND n.is_read
+                           AND n.notification_status IN ('sent', 'canceled')
+                         LIMIT %s
+                           FOR UPDATE OF n SKIP LOCKED
+                       )
+            """, [list(RETENTION_MODELS), cutoff, batch_size])
+            deleted = self.env.cr.rowcount
+            purged += deleted
+            self.env.cr.commit()
+            if deleted < batch_size:
+                break
+        return purged
+    
+    @api.model
+    def _cron_compact_chatter(self, batch_size=500):
+        """Compact old tracking history and drop redundant notifications
+        
+        Every batch is committed on its own and locked rows are skipped, so
+        the job never holds locks for long nor waits on users.
+        """
+        cutoff = self._get_retention_cutoff()
+        if not cutoff:
+            return
+        for model_name in RETENTION_MODELS:
+            self.env[model_name].flush_model()
+            compacted = self._compact_model(model_name, cutoff, batch_size)
+            _logger.info("GearGuard chatter retention: %s messages of %s compacted", compacted, model_name)
+        purged = self._purge_read_notifications(cutoff, batch_size * 10)
+        _logger.info("GearGuard chatter retention: %s notifications purged", purged)
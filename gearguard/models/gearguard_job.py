@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.exceptions import AccessError
+
+_logger = logging.getLogger(__name__)
+
+# Retry backoff: RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+RETRY_BASE_SECONDS = 60
+
+# Methods a job may call; anything else is refused at enqueue and run time
+JOB_METHODS = {'message_post', '_apply_request_stage'}
+
+
+class GearGuardJob(models.Model):
+    """Deferred Side-Effect Job
+    
+    Database-backed queue for non-critical side effects (chatter posts,
+    notifications) so user actions return as soon as the core write commits.
+    Jobs are drained by a cron worker using FOR UPDATE SKIP LOCKED, so
+    several workers can run in parallel without blocking each other.
+    """
+    _name = 'gearguard.job'
+    _description = 'GearGuard Deferred Job'
+    _order = 'eta, id'
+
+    name = fields.Char(
+        string='Description',
+        required=True
+    )
+    
+    model_name = fields.Char(
+        string='Model',
+        required=True
+    )
+    
+    res_ids = fields.Json(
+        string='Record IDs',
+        help="IDs of the records the method is called on"
+    )
+    
+    method_name = fields.Char(
+        string='Method',
+        required=True
+    )
+    
+    kwargs = fields.Json(
+        string='Arguments',
+        help="Keyword arguments passed to the method"
+    )
+    
+    user_id = fields.Many2one(
+        'res.users',
+        string='Run As',
+        default=lambda self: self.env.user,
+        help="User on whose behalf the job runs"
+    )
+    
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, index=True)
+    
+    eta = fields.Datetime(
+        string='Run After',
+        default=fields.Datetime.now,
+        required=True,
+        help="The job will not run before this time"
+    )
+    
+    attempts = fields.Integer(
+        string='Attempts',
+        default=0
+    )
+    
+    max_attempts = fields.Integer(
+        string='Max Attempts',
+        default=5
+    )
+    
+    date_done = fields.Datetime(
+        string='Done On',
+        readonly=True
+    )
+    
+    error = fields.Text(
+        string='Last Error',
+        readonly=True
+    )
+    
+    # -------------------------------------------------------------------------
+    # DATABASE INDEXES
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Partial index over pending jobs for the dequeue query"""
+        super().init()
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS gearguard_job_pending_eta_index
+                ON gearguard_job (eta, id)
+             WHERE state = 'pending'
+        """)
+    
+    # -------------------------------------------------------------------------
+    # ENQUEUE
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _enqueue(self, records, method_name, eta=None, **kwargs):
+        """Defer ``records.method_name(**kwargs)`` to a background worker
+        
+        ``kwargs`` must be JSON-serializable. The job runs as the current user.
+        Only the methods listed in JOB_METHODS can be deferred.
+        """
+        if method_name not in JOB_METHODS:
+            raise ValueError(f"Method {method_name!r} cannot be run as a GearGuard job")
+        job = self.sudo().create({
+            'name': f"{records._name}.{method_name}",
+            'model_name': records._name,
+            'res_ids': records.ids,
+            'method_name': method_name,
+            'kwargs': kwargs,
+            'user_id': self.env.uid,
+            'eta': eta or fields.Datetime.now(),
+        })
+        # Wake up a worker once per transaction instead of waiting for the next cron tick
+        if not self.env.cr.precommit.data.get('gearguard.job.triggered'):
+            self.env.cr.precommit.data['gearguard.job.triggered'] = True
+            cron = self.env.ref('gearguard.ir_cron_gearguard_job_runner', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+        return job
+    
+    # -------------------------------------------------------------------------
+    # EXECUTION
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _cron_run_jobs(self, limit=500):
+        """Drain pending jobs, one short transaction per job
+        
+        Jobs are claimed with FOR UPDATE SKIP LOCKED so parallel cron workers
+        never wait on each other.
+        """
+        for __ in range(limit):
+            self.env.cr.execute("""
+                SELECT id
+                  FROM gearguard_job
+                 WHERE state = 'pending'
+                   AND eta <= NOW() AT TIME ZONE 'UTC'
+              ORDER BY eta, id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            self.browse(row[0])._run()
+            self.env.cr.commit()
+    
+    def _run(self):
+        """Execute the job; on failure reschedule with exponential backoff"""
+        self.ensure_one()
+        try:
+            if self.method_name not in JOB_METHODS:
+                raise ValueError(f"Method {self.method_name!r} is not allowed in GearGuard jobs")
+            records = self.env[self.model_name].with_user(self.user_id).browse(self.res_ids or []).exists()
+            with self.env.cr.savepoint():
+                getattr(records, self.method_name)(**(self.kwargs or {}))
+        except Exception as e:
+            _logger.warning("GearGuard job %s (%s) failed", self.id, self.name, exc_info=True)
+            attempts = self.attempts + 1
+            vals = {'attempts': attempts, 'error': str(e)}
+            if attempts >= self.max_attempts:
+                vals['state'] = 'failed'
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+                vals['eta'] = fields.Datetime.now() + timedelta(seconds=delay)
+            self.write(vals)
+        else:
+            self.write({
+                'state': 'done',
+                'attempts': self.attempts + 1,
+                'date_done': fields.Datetime.now(),
+                'error': False,
+            })
+    
+    @api.autovacuum
+    def _gc_done_jobs(self):
+        """Remove jobs completed more than a week ago"""
+        limit_date = fields.Datetime.now() - timedelta(days=7)
+        self.search([('state', '=', 'done'), ('date_done', '<', limit_date)]).unlink()
+    
+    # -------------------------------------------------------------------------
+    # ACTIONS
+    # -------------------------------------------------------------------------
+    
+    def action_requeue(self):
+        """Put failed jobs back in the queue
+        
+        Jobs are read-only for managers; only this reset is allowed, as sudo.
+        """
+        if not self.env.user.has_group('gearguard.group_gearguard_manager'):
+            raise AccessError("Only maintenance managers can requeue jobs.")
+        self.filtered(lambda job: job.state == 'failed').sudo().write({
+            'state': 'pending',
+            'attempts': 0,
+            'eta': fields.Datetime.now(),
+        })
+        return True
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+from ..tools import reporting_env
+
+
+class GearGuardReportingMixin(models.AbstractModel):
+    """Replica-aware Reporting Mixin
+    
+    Grouped reads (pivot, graph, grouped lists) issued with the
+    ``gearguard_reporting`` context key run on the reporting replica when
+    one is configured and fresh enough, and on the primary otherwise.
+    """
+    _name = 'gearguard.reporting.mixin'
+    _description = 'GearGuard Replica-aware Reporting Mixin'
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        """Route reporting aggregates to the replica"""
+        if self.env.context.get('gearguard_reporting') and not self.env.context.get('gearguard_no_replica'):
+            with reporting_env(self.env) as env:
+                if env is not self.env:
+                    return env[self._name].read_group(
+                        domain, fields, groupby, offset=offset, limit=limit, orderby=orderby, lazy=lazy,
+                    )
+        return super().read_group(domain, fields, groupby, offset=offset, limit=limit, orderby=orderby, lazy=lazy)
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError, UserError
+from odoo.tools import sql, SQL
+
+# Records and tombstones returned per model and page
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+
+# Rows written in the last seconds are held back until the transactions
+# that wrote them are surely committed, so a cursor never skips them
+SYNC_SAFETY_SECONDS = 30
+
+# Tombstones are kept this long; older cursors must resync from scratch
+TOMBSTONE_RETENTION_DAYS = 90
+
+# Models exposed to devices, in pull order
+SYNC_MODELS = ['maintenance.stage', 'equipment.equipment', 'maintenance.request']
+
+
+class GearGuardSyncMixin(models.AbstractModel):
+    """Offline Sync Mixin
+    
+    Models synced to technician devices declare the fields sent in
+    ``_gearguard_sync_fields`` and the ones devices may change offline in
+    ``_gearguard_sync_writable_fields``. Deleted rows, and rows leaving the
+    scope of the devices holding them (a change of one of
+    ``_gearguard_sync_scope_fields``), leave a tombstone; (write_date, id)
+    is indexed for keyset pulls.
+    """
+    _name = 'gearguard.sync.mixin'
+    _description = 'GearGuard Offline Sync Mixin'
+    
+    _gearguard_sync_fields = []
+    _gearguard_sync_writable_fields = []
+    _gearguard_sync_scope_fields = ['active']
+    
+    def init(self):
+        """Keyset index for delta pulls"""
+        super().init()
+        if self._abstract:
+            return
+        sql.create_index(
+            self.env.cr, f'{self._table}_write_date_id_index', self._table, ['write_date', 'id'],
+        )
+    
+    @api.model
+    def _gearguard_sync_domain(self):
+        """Records the current user's device should hold"""
+        return []
+    
+    def _gearguard_sync_holders(self):
+        """{record id: (user id, team id)} of the records devices hold
+        
+        Must match ``_gearguard_sync_domain``: devices hold a record through
+        its user or its team, (False, False) standing for every device.
+        Records no device holds are left out.
+        """
+        records = self.filtered(self._active_name) if self._active_name else self
+        return {record.id: (False, False) for record in records}
+    
+    def write(self, vals):
+        """Leave tombstones for the devices that stop holding these records"""
+        if not any(name in vals for name in self._gearguard_sync_scope_fields):
+            return super().write(vals)
+        before = self._gearguard_sync_holders()
+        res = super().write(vals)
+        after = self._gearguard_sync_holders()
+        self.env['gearguard.sync.tombstone']._record(self._name, {
+            res_id: holder for res_id, holder in before.items() if after.get(res_id) != holder
+        })
+        return res
+    
+    def unlink(self):
+        """Leave tombstones for devices holding these records"""
+        self.env['gearguard.sync.tombstone']._record(self._name, self._gearguard_sync_holders())
+        return super().unlink()
+
+
+class GearGuardSyncTombstone(models.Model):
+    """Deleted Record Tombstone
+    
+    Remembers deleted synced records, and records that left the scope of
+    the devices holding them through a user or a team, so those devices
+    can drop them.
+    """
+    _name = 'gearguard.sync.tombstone'
+    _description = 'GearGuard Sync Tombstone'
+    _order = 'id'
+    _log_access = False
+    
+    model_name = fields.Char(
+        string='Model',
+        required=True
+    )
+    
+    res_id = fields.Integer(
+        string='Record ID',
+        required=True
+    )
+    
+    deleted_at = fields.Datetime(
+        string='Deleted On',
+        required=True,
+        default=fields.Datetime.now
+    )
+    
+    user_id = fields.Integer(
+        string='Held Through User',
+        help="Devices of this user held the record (no user nor team: every device)"
+    )
+    
+    team_id = fields.Integer(
+        string='Held Through Team',
+        help="Devices of this team's members held the record"
+    )
+    
+    def init(self):
+        """Keyset index for tombstone pulls"""
+        super().init()
+        sql.create_index(
+            self.env.cr, 'gearguard_sync_tombstone_model_id_index', self._table, ['model_name', 'id'],
+        )
+    
+    @api.model
+    def _record(self, model_name, holders):
+        """Insert the tombstones of ``holders`` ({res_id: (user id, team id)}) in one batch"""
+        if not holders:
+            return
+        self.sudo().create([{
+            'model_name': model_name,
+            'res_id': res_id,
+            'user_id': user_id or False,
+            'team_id': team_id or False,
+        } for res_id, (user_id, team_id) in holders.items()])
+    
+    @api.autovacuum
+    def _gc_tombstones(self):
+        """Drop tombstones past the retention window
+        
+        The highest id dropped is remembered: cursors below it may have
+        missed deletions and their devices are asked to resync.
+        """
+        self.env.cr.execute("""
+            DELETE FROM gearguard_sync_tombstone
+             WHERE deleted_at < (now() at time zone 'UTC') - make_interval(days => %s)
+         RETURNING id
+        """, [TOMBSTONE_RETENTION_DAYS])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        if ids:
+            self.env['ir.config_parameter'].sudo().set_param('gearguard.sync_tombstone_gc_id', max(ids))
+
+
+class GearGuardSync(models.AbstractModel):
+    """Delta Sync Service for Offline Devices
+    
+    Pulls return the records changed since a per-model cursor
+    (write_date, id, last tombstone id) with keyset pagination, the device's
+    scope being part of the query; records the device held that were
+    deleted or left its scope come back as deleted ids. Pushes apply offline edits with optimistic conflict detection on
+    write_date.
+    """
+    _name = 'gearguard.sync'
+    _description = 'GearGuard Offline Sync'
+    
+    # -------------------------------------------------------------------------
+    # CURSORS
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _parse_cursor(self, cursor):
+        """Return (write_date, id, tombstone id) from an opaque cursor"""
+        if not cursor:
+            return None, 0, 0
+        try:
+            write_date, last_id, tombstone_id = cursor.split('|')
+            return datetime.fromisoformat(write_date) if write_date else None, int(last_id), int(tombstone_id)
+        except ValueError:
+            raise UserError(_("Invalid sync cursor: %s", cursor))
+    
+    @api.model
+    def _format_cursor(self, write_date, last_id, tombstone_id):
+        """Opaque cursor; write_date keeps its microseconds"""
+        return f"{write_date.isoformat() if write_date else ''}|{last_id}|{tombstone_id}"
+    
+    # -------------------------------------------------------------------------
+    # PULL
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def sync_pull(self, cursors=None, limit=SYNC_PAGE_SIZE):
+        """Changes since ``cursors`` ({model: cursor}) for every synced model
+        
+        Returns {model: {records, deleted, cursor, has_more, reset}}. Devices
+        call again with the returned cursors until no model has more; a
+        ``reset`` asks the device to drop its copy of the model.
+        """
+        cursors = cursors or {}
+        limit = max(1, min(int(limit), SYNC_MAX_PAGE_SIZE))
+        return {
+            model_name: self._pull_model(model_name, cursors.get(model_name), limit)
+            for model_name in SYNC_MODELS
+        }
+    
+    @api.model
+    def _pull_model(self, model_name, cursor, limit):
+        """One keyset page of changes for a single model"""
+        Model = self.env[model_name]
+        Model.check_access_rights('read')
+        write_date, last_id, tombstone_id = self._parse_cursor(cursor)
+        reset = False
+        gc_id = int(self.env['ir.config_parameter'].sudo().get_param('gearguard.sync_tombstone_gc_id', 0))
+        if write_date and tombstone_id < gc_id:
+            write_date, last_id, tombstone_id = None, 0, 0
+            reset = True
+        initial = write_date is None
+        Model.flush_model()
+        cr = self.env.cr
+        
+        # Changed rows in the device's scope, keyset-paged on (write_date, id)
+        scope = Model._gearguard_sync_domain()
+        query = Model._search(scope)
+        write_date_column = SQL.identifier(query.table, 'write_date')
+        id_column = SQL.identifier(query.table, 'id')
+        query.add_where(SQL(
+            "(%s, %s) > (%s, %s) AND %s < (now() at time zone 'UTC') - make_interval(secs => %s)",
+            write_date_column, id_column, write_date or datetime.min, last_id,
+            write_date_column, SYNC_SAFETY_SECONDS,
+        ))
+        query.order = SQL("%s, %s", write_date_column, id_column)
+        query.limit = limit
+        cr.execute(query.select(id_column, write_date_column))
+        rows = cr.fetchall()
+        versions = dict(rows)
+        records = Model.browse([row[0] for row in rows]).read(Model._gearguard_sync_fields)
+        for record in records:
+            record['write_date'] = versions[record['id']].isoformat()
+        
+        # Deleted rows and rows that left the scope, among the ones held by
+        # the user's devices (through the user or one of the user's teams)
+        cr.execute("""
+            SELECT COALESCE(MAX(id), 0)
+              FROM gearguard_sync_tombstone
+             WHERE deleted_at < (now() at time zone 'UTC') - make_interval(secs => %s)
+        """, [SYNC_SAFETY_SECONDS])
+        horizon = max(cr.fetchone()[0], tombstone_id)
+        tombstones = []
+        deleted = []
+        if not initial:
+            team_ids = list(self.env['maintenance.team']._get_user_team_ids(self.env.uid))
+            cr.execute("""
+                SELECT id, res_id
+                  FROM gearguard_sync_tombstone
+                 WHERE model_name = %s
+                   AND id > %s
+                   AND id <= %s
+                   AND (user_id = %s
+                        OR team_id = ANY(%s)
+                        OR (user_id IS NULL AND team_id IS NULL))
+              ORDER BY id
+                 LIMIT %s
+            """, [model_name, tombstone_id, horizon, self.env.uid, team_ids, limit])
+            tombstones = cr.fetchall()
+            left = {res_id for __, res_id in tombstones}
+            # Moved within the scope (e.g., to another technician of the team)
+            kept = Model.search([('id', 'in', list(left))] + scope) if left else Model
+            deleted = sorted(left - set(kept.ids))
+        # Once the last page is read, the cursor moves past every tombstone
+        # scanned, including those of other models and devices
+        tombstone_id = tombstones[-1][0] if len(tombstones) == limit else horizon
+        
+        if rows:
+            last_id, write_date = rows[-1]
+        return {
+            'records': records,
+            'deleted': deleted,
+            'cursor': self._format_cursor(write_date, last_id, tombstone_id),
+            'has_more': len(rows) == limit or len(tombstones) == limit,
+            'reset': reset,
+        }
+    
+    # -------------------------------------------------------------------------
+    # PUSH
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def sync_push(self, changes):
+        """Apply a batch of offline edits
+        
+        Each change is {model, id, write_date, values, ref} where write_date
+        is the version the device edited (naive UTC; aware values are
+        converted). Only rows the user may write within the device's scope
+        are locked, in id order; a change is applied only if the row was not
+        modified since, otherwise the current server record is returned as
+        a conflict. Returns one result per change, in order.
+        """
+        cr = self.env.cr
+        valid = {}
+        results = []
+        for index, change in enumerate(changes):
+            result = {'index': index, 'ref': change.get('ref')}
+            results.append(result)
+            model_name = change.get('model')
+            values = change.get('values') or {}
+            if model_name not in SYNC_MODELS:
+                result.update(status='error', error=_("Model %s is not synced", model_name))
+                continue
+            forbidden = set(values) - set(self.env[model_name]._gearguard_sync_writable_fields)
+            if forbidden:
+                result.update(status='error', error=_("Fields not writable offline: %s", ', '.join(sorted(forbidden))))
+                continue
+            try:
+                base_version = datetime.fromisoformat(change['write_date'])
+                if base_version.tzinfo:
+                    base_version = base_version.astimezone(timezone.utc).replace(tzinfo=None)
+                res_id = int(change['id'])
+            except (KeyError, TypeError, ValueError):
+                result.update(status='error', error=_("Missing or invalid id/write_date"))
+                continue
+            valid.setdefault(model_name, []).append((result, res_id, base_version, values))
+        
+        for model_name, model_changes in valid.items():
+            Model = self.env[model_name]
+            Model.flush_model()
+            res_ids = list({res_id for __, res_id, __, __ in model_changes})
+            existing = set(Model.browse(res_ids).exists().ids)
+            if Model.check_access_rights('write', raise_exception=False):
+                allowed = Model.search([('id', 'in', res_ids)] + Model._gearguard_sync_domain())
+                allowed_ids = set(allowed._filter_access_rules('write').ids)
+            else:
+                allowed_ids = set()
+            versions = {}
+            if allowed_ids:
+                cr.execute(SQL("""
+                    SELECT id, write_date
+                      FROM %s
+                     WHERE id IN %s
+                  ORDER BY id
+                       FOR NO KEY UPDATE
+                """, SQL.identifier(Model._table), tuple(allowed_ids)))
+                versions = dict(cr.fetchall())
+            applied = {}
+            for result, res_id, base_version, values in model_changes:
+                record = Model.browse(res_id)
+                if res_id not in existing:
+                    result.update(status='deleted')
+                elif res_id not in versions:
+                    result.update(status='error', error=_("Record %s is not writable from this device", res_id))
+                elif versions[res_id] > base_version:
+                    record.invalidate_recordset()
+                    try:
+                        current = record.read(Model._gearguard_sync_fields)[0]
+                        current['write_date'] = versions[res_id].isoformat()
+                    except AccessError:
+                        current = None
+                    result.update(status='conflict', record=current)
+                else:
+                    try:
+                        with cr.savepoint():
+                            record.write(values)
+                            record.flush_recordset()
+                    except Exception as e:
+                        result.update(status='error', error=str(e))
+                    else:
+                        result.update(status='applied')
+                        applied[res_id] = result
+            if applied:
+                cr.execute(SQL(
+                    "SELECT id, write_date FROM %s WHERE id IN %s",
+                    SQL.identifier(Model._table), tuple(applied),
+                ))
+                for res_id, write_date in cr.fetchall():
+                    applied[res_id]['write_date'] = write_date.isoformat()
+        return results
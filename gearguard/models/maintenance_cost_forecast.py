@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError
+
+from ..tools import reliability
+
+_logger = logging.getLogger(__name__)
+
+FORECAST_SOURCES = [
+    ('planned', 'Planned Preventive'),
+    ('corrective', 'Expected Corrective'),
+]
+
+
+class MaintenanceCostForecast(models.Model):
+    """Maintenance Cost Forecast
+    
+    Projected requests, hours and spend per month, work center, team and
+    category. Rows are rebuilt as a whole by the forecast job and stored in
+    a plain table, so the pivot opens without computing anything:
+    
+    - planned: open preventive requests already scheduled in the month,
+      costed at their estimate or their duration at the work center rate;
+    - corrective: the exponentially weighted monthly breakdown rate of the
+      last months (see tools.reliability), repeated over the horizon.
+    """
+    _name = 'maintenance.cost.forecast'
+    _description = 'Maintenance Cost Forecast'
+    _inherit = ['gearguard.reporting.mixin']
+    _order = 'month, source, id'
+    _log_access = False
+    
+    month = fields.Date(
+        string='Month',
+        required=True,
+        readonly=True,
+        help="First day of the projected month"
+    )
+    
+    source = fields.Selection(
+        FORECAST_SOURCES,
+        string='Source',
+        required=True,
+        readonly=True
+    )
+    
+    work_center_id = fields.Many2one(
+        'maintenance.work.center',
+        string='Work Center',
+        readonly=True,
+        ondelete='cascade'
+    )
+    
+    maintenance_team_id = fields.Many2one(
+        'maintenance.team',
+        string='Maintenance Team',
+        readonly=True,
+        ondelete='cascade'
+    )
+    
+    category_id = fields.Many2one(
+        'equipment.category',
+        string='Equipment Category',
+        readonly=True,
+        ondelete='cascade'
+    )
+    
+    request_count = fields.Float(
+        string='# Requests',
+        digits=(16, 2),
+        readonly=True,
+        help="Scheduled requests, or expected breakdowns for corrective rows"
+    )
+    
+    hours = fields.Float(
+        string='Hours',
+        readonly=True
+    )
+    
+    cost = fields.Float(
+        string='Cost',
+        digits='Product Price',
+        readonly=True
+    )
+    
+    computed_on = fields.Datetime(
+        string='Computed On',
+        readonly=True
+    )
+    
+    # -------------------------------------------------------------------------
+    # FORECAST JOB
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _get_forecast_settings(self):
+        """Return (months ahead, months of history) from the system parameters"""
+        params = self.env['ir.config_parameter'].sudo()
+        months = int(params.get_param('gearguard.forecast_months', 6))
+        history_months = int(params.get_param('gearguard.forecast_history_months', 12))
+        return max(months, 1), max(history_months, 1)
+    
+    @api.model
+    def _fetch_planned(self, month_start, horizon_end):
+        """Open preventive work scheduled within the horizon, per month and group"""
+        self.env.cr.execute("""
+            SELECT date_trunc('month', r.scheduled_date)::date,
+                   r.work_center_id,
+                   r.maintenance_team_id,
+                   r.category_id,
+                   COUNT(*),
+                   SUM(COALESCE(r.duration, 0)),
+                   SUM(COALESCE(NULLIF(r.estimated_cost, 0), COALESCE(r.duration, 0) * COALESCE(wc.total_cost, 0)))
+              FROM maintenance_request r
+         LEFT JOIN maintenance_work_center wc ON wc.id = r.work_center_id
+             WHERE r.request_type = 'preventive'
+               AND r.active
+               AND r.is_closed IS NOT TRUE
+               AND r.scheduled_date >= %s
+               AND r.scheduled_date < %s
+          GROUP BY 1, 2, 3, 4
+        """, [month_start, horizon_end])
+        return self.env.cr.fetchall()
+    
+    @api.model
+    def _fetch_corrective_history(self, history_start, month_start):
+        """Monthly corrective totals per group over the history window
+        
+        Closed requests are costed at their actual cost, open ones at their
+        estimate, falling back to duration at the work center rate plus parts.
+        """
+        self.env.cr.execute("""
+            SELECT COALESCE(r.work_center_id, 0),
+                   COALESCE(r.maintenance_team_id, 0),
+                   COALESCE(r.category_id, 0),
+                   (EXTRACT(YEAR FROM age(date_trunc('month', r.request_date), %(start)s)) * 12
+                    + EXTRACT(MONTH FROM age(date_trunc('month', r.request_date), %(start)s)))::int,
+                   COUNT(*),
+                   SUM(COALESCE(r.duration, 0)),
+                   SUM(COALESCE(
+                       NULLIF(r.actual_cost, 0),
+                       NULLIF(r.estimated_cost, 0),
+                       COALESCE(r.duration, 0) * COALESCE(wc.total_cost, 0) + COALESCE(r.parts_cost, 0)
+                   ))
+              FROM maintenance_request r
+         LEFT JOIN maintenance_work_center wc ON wc.id = r.work_center_id
+             WHERE r.request_type = 'corrective'
+               AND r.active
+               AND r.request_date >= %(start)s
+               AND r.request_date < %(stop)s
+          GROUP BY 1, 2, 3, 4
+        """, {'start': history_start, 'stop': month_start})
+        return self.env.cr.fetchall()
+    
+    @api.model
+    def _project_corrective(self, rows, history_months, months):
+        """Expected corrective (count, hours, cost) per group and future month
+        
+        Returns one tuple per row to insert, with month offsets from the
+        current month.
+        """
+        np = reliability.np
+        if np is None:
+            _logger.warning("Skipping the corrective cost forecast: numpy is not installed")
+            return []
+        if not rows:
+            return []
+        groups, month_idx, values = [], [], []
+        group_index = {}
+        for wc_id, team_id, category_id, month, count, hours, cost in rows:
+            key = (wc_id, team_id, category_id)
+            groups.append(group_index.setdefault(key, len(group_index)))
+            month_idx.append(month)
+            values.append((count, hours, cost))
+        history = np.zeros((len(group_index), history_months, 3))
+        history[np.asarray(groups), np.asarray(month_idx)] = np.asarray(values, dtype=np.float64)
+        rates = reliability.weighted_monthly_rates(history).round(2)
+        
+        keys = list(group_index)
+        kept = np.flatnonzero(rates[:, 0] > 0)
+        return [
+            (offset, *keys[g], *rates[g].tolist())
+            for offset in range(months)
+            for g in kept.tolist()
+        ]
+    
+    @api.model
+    def _cron_compute_forecast(self):
+        """Rebuild the whole forecast
+        
+        History is aggregated in SQL, projected with NumPy in one pass over
+        all groups, and the table is swapped with one DELETE and one INSERT
+        in the job's transaction: the report keeps showing the previous
+        forecast until the new one is committed.
+        """
+        months, history_months = self._get_forecast_settings()
+        month_start = fields.Date.context_today(self).replace(day=1)
+        horizon_end = month_start + relativedelta(months=months)
+        history_start = month_start - relativedelta(months=history_months)
+        self.env['maintenance.request'].flush_model()
+        self.env['maintenance.work.center'].flush_model(['total_cost'])
+        
+        # Serialize concurrent refreshes; readers are not blocked
+        self.env.cr.execute("LOCK TABLE maintenance_cost_forecast IN EXCLUSIVE MODE")
+        
+        rows = []
+        for month, wc_id, team_id, category_id, count, hours, cost in self._fetch_planned(month_start, horizon_end):
+            rows.append((month, 'planned', wc_id, team_id, category_id, count, hours, cost))
+        corrective = self._project_corrective(
+            self._fetch_corrective_history(history_start, month_start), history_months, months,
+        )
+        for offset, wc_id, team_id, category_id, count, hours, cost in corrective:
+            month = month_start + relativedelta(months=offset)
+            rows.append((month, 'corrective', wc_id or None, team_id or None, category_id or None, count, hours, cost))
+        
+        self.env.cr.execute("DELETE FROM maintenance_cost_forecast")
+        if rows:
+            columns = list(zip(*rows))
+            self.env.cr.execute("""
+                INSERT INTO maintenance_cost_forecast
+                       (month, source, work_center_id, maintenance_team_id, category_id,
+                        request_count, hours, cost, computed_on)
+                SELECT *, now() at time zone 'UTC'
+                  FROM unnest(%s::date[], %s::varchar[], %s::int[], %s::int[], %s::int[],
+                              %s::float8[], %s::float8[], %s::float8[])
+            """, [list(column) for column in columns])
+        self.invalidate_model()
+        _logger.info("GearGuard cost forecast: %s rows over %s months", len(rows), months)
+    
+    # -------------------------------------------------------------------------
+    # ACTIONS
+    # -------------------------------------------------------------------------
+    
+    def action_refresh_forecast(self):
+        """Recompute the forecast now and reload the report"""
+        if not self.env.user.has_group('gearguard.group_gearguard_manager'):
+            raise AccessError(_("Only maintenance managers can refresh the cost forecast."))
+        self.sudo()._cron_compute_forecast()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
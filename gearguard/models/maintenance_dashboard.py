@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from ..tools import TtlCache, create_shared_generation, shared_generation, bump_shared_generation, reporting_env
+
+# KPI bundles per (database, user, companies); cleared on request/equipment commits
+KPI_CACHE = TtlCache(ttl=30)
+
+# Shared generation of the KPI bundles, bumped by every committed change
+KPI_GENERATION = 'gearguard_kpi_cache_seq'
+
+
+class MaintenanceDashboard(models.AbstractModel):
+    """Maintenance KPI Dashboard
+    
+    Builds the whole wallboard KPI bundle (open requests by stage and team,
+    overdue counts, work center utilization, warranty expiries) with a
+    handful of aggregate queries, and caches it with a short TTL.
+    """
+    _name = 'maintenance.dashboard'
+    _description = 'Maintenance KPI Dashboard'
+
+    # -------------------------------------------------------------------------
+    # CACHE
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Generation counter of the KPI bundles"""
+        super().init()
+        create_shared_generation(self.env.cr, KPI_GENERATION)
+    
+    @api.model
+    def get_kpis(self):
+        """Return the cached KPI bundle, computing it on a cache miss
+        
+        Bundles are cached per worker under the KPI_GENERATION counter, so
+        a change committed in any worker is visible on the next call. The
+        bundle replacing an invalidated one is computed on the primary: the
+        replica may not have replayed the change yet, and its stale numbers
+        would then be cached for a whole TTL.
+        """
+        key = (self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids))
+        generation = shared_generation(self.env.cr, KPI_GENERATION)
+        kpis = KPI_CACHE.get(key, generation)
+        if kpis is None:
+            ttl = int(self.env['ir.config_parameter'].sudo().get_param('gearguard.kpi_cache_ttl', 30))
+            dashboard = self
+            if KPI_CACHE.superseded(key, generation):
+                dashboard = self.with_context(gearguard_no_replica=True)
+            with reporting_env(dashboard.env) as env:
+                kpis = env['maintenance.dashboard']._compute_kpis()
+            KPI_CACHE.set(key, kpis, ttl, generation)
+        return kpis
+    
+    @api.model
+    def _invalidate_cache(self):
+        """Drop this database's KPI bundles, in every worker, once the transaction commits
+        
+        The shared generation is bumped after the commit, so no worker can
+        cache a bundle missing the change under the new generation.
+        """
+        if self.env.cr.postcommit.data.get('gearguard.kpi_cache_invalidated'):
+            return
+        self.env.cr.postcommit.data['gearguard.kpi_cache_invalidated'] = True
+        registry = self.env.registry
+        
+        def invalidate():
+            # Entries are kept: their old generation routes the recompute to the primary
+            with registry.cursor() as cr:
+                bump_shared_generation(cr, KPI_GENERATION)
+        self.env.cr.postcommit.add(invalidate)
+    
+    # -------------------------------------------------------------------------
+    # AGGREGATES
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _compute_kpis(self):
+        """Compute the KPI bundle with one aggregate query per indicator"""
+        today = fields.Date.context_today(self)
+        Request = self.env['maintenance.request']
+        open_domain = [('is_closed', '=', False)]
+        
+        # Open requests by stage and team (one grouped query)
+        open_by_stage = {}
+        open_by_team = {}
+        for stage, team, count in Request._read_group(
+                open_domain, ['stage_id', 'maintenance_team_id'], ['__count']):
+            stage_row = open_by_stage.setdefault(stage.id, {
+                'stage_id': stage.id, 'stage': stage.display_name, 'count': 0})
+            stage_row['count'] += count
+            team_row = open_by_team.setdefault(team.id, {
+                'team_id': team.id, 'team': team.display_name, 'open': 0, 'overdue': 0})
+            team_row['open'] += count
+        
+        # Overdue requests by team (deadline based, never stale)
+        overdue_count = 0
+        for team, count in Request._read_group(
+                open_domain + [('deadline', '<', today)], ['maintenance_team_id'], ['__count']):
+            overdue_count += count
+            open_by_team.setdefault(team.id, {
+                'team_id': team.id, 'team': team.display_name, 'open': 0, 'overdue': 0,
+            })['overdue'] = count
+        
+        # Work center utilization over the last 30 days
+        hours_by_center = dict(Request._read_group(
+            [('is_closed', '=', True), ('close_date', '>=', today - timedelta(days=30)),
+             ('work_center_id', '!=', False)],
+            ['work_center_id'], ['duration:sum'],
+        ))
+        work_centers = []
+        for center in self.env['maintenance.work.center'].search([]):
+            hours = hours_by_center.get(center, 0.0)
+            max_capacity = center.capacity * 30
+            work_centers.append({
+                'id': center.id,
+                'name': center.name,
+                'code': center.code,
+                'hours': hours,
+                'utilization': (hours / max_capacity) * 100 if max_capacity else 0.0,
+            })
+        
+        # Warranty expiries in the next 30 days
+        expiring = self.env['equipment.equipment'].search_read(
+            [('warranty_expiry', '>=', today), ('warranty_expiry', '<=', today + timedelta(days=30))],
+            ['name', 'serial_number', 'warranty_expiry'],
+            order='warranty_expiry',
+        )
+        
+        return {
+            'generated_at': fields.Datetime.to_string(fields.Datetime.now()),
+            'open_count': sum(row['count'] for row in open_by_stage.values()),
+            'overdue_count': overdue_count,
+            'open_by_stage': list(open_by_stage.values()),
+            'open_by_team': list(open_by_team.values()),
+            'work_centers': work_centers,
+            'warranty_expiring': [
+                dict(row, warranty_expiry=fields.Date.to_string(row['warranty_expiry']))
+                for row in expiring
+            ],
+        }
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+from odoo.tools import sql
+
+# Separator between levels in complete names (e.g., Site A / Building 2 / Floor 1)
+LOCATION_SEPARATOR = ' / '
+
+
+class MaintenanceLocation(models.Model):
+    """Maintenance Location
+    
+    Sites, buildings, floors and rooms as a tree, referenced by equipment
+    and work centers. Subtree filters (child_of) and counts go through a
+    prefix index on parent_path.
+    """
+    _name = 'maintenance.location'
+    _description = 'Maintenance Location'
+    _parent_store = True
+    _rec_name = 'complete_name'
+    _order = 'complete_name'
+    
+    name = fields.Char(
+        string='Location Name',
+        required=True,
+        help="Name of this level only (e.g., Floor 2)"
+    )
+    
+    complete_name = fields.Char(
+        string='Full Location',
+        compute='_compute_complete_name',
+        recursive=True,
+        store=True
+    )
+    
+    active = fields.Boolean(
+        string='Active',
+        default=True
+    )
+    
+    parent_id = fields.Many2one(
+        'maintenance.location',
+        string='Parent Location',
+        index=True,
+        ondelete='restrict',
+        help="Site, building or floor containing this location"
+    )
+    
+    # Materialized path; also indexed with text_pattern_ops in init() for prefix scans
+    parent_path = fields.Char(
+        index=True,
+        unaccent=False
+    )
+    
+    child_ids = fields.One2many(
+        'maintenance.location',
+        'parent_id',
+        string='Sub-locations'
+    )
+    
+    equipment_count = fields.Integer(
+        string='Equipment',
+        compute='_compute_subtree_counts',
+        help="Equipment in this location and its sub-locations"
+    )
+    
+    work_center_count = fields.Integer(
+        string='Work Centers',
+        compute='_compute_subtree_counts',
+        help="Work centers in this location and its sub-locations"
+    )
+    
+    # -------------------------------------------------------------------------
+    # COMPUTE METHODS
+    # -------------------------------------------------------------------------
+    
+    @api.depends('name', 'parent_id.complete_name')
+    def _compute_complete_name(self):
+        """Full path from the site down to this location"""
+        for location in self:
+            if location.parent_id:
+                location.complete_name = f"{location.parent_id.complete_name}{LOCATION_SEPARATOR}{location.name}"
+            else:
+                location.complete_name = location.name
+    
+    def _compute_subtree_counts(self):
+        """Count equipment and work centers of each subtree in two aggregates
+        
+        Each location is joined to its subtree through a prefix range on
+        parent_path (served by the text_pattern_ops index).
+        """
+        counts = {}
+        if self.ids:
+            self.flush_model(['parent_path'])
+            for model_name, key in [('equipment.equipment', 0), ('maintenance.work.center', 1)]:
+                Model = self.env[model_name]
+                Model.flush_model(['location_id', 'active'])
+                self.env.cr.execute(f"""
+                    SELECT anc.id, COUNT(t.id)
+                      FROM maintenance_location anc
+                      JOIN maintenance_location l
+                        ON l.parent_path ~>=~ anc.parent_path
+                       AND l.parent_path ~<~ anc.parent_path || '~'
+                      JOIN {Model._table} t
+                        ON t.location_id = l.id
+                       AND t.active
+                     WHERE anc.id IN %s
+                  GROUP BY anc.id
+                """, [tuple(self.ids)])
+                for location_id, count in self.env.cr.fetchall():
+                    counts.setdefault(location_id, [0, 0])[key] = count
+        for location in self:
+            location.equipment_count, location.work_center_count = counts.get(location.id, (0, 0))
+    
+    # -------------------------------------------------------------------------
+    # DATABASE INDEXES
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Prefix index on parent_path for subtree (child_of) scans"""
+        super().init()
+        sql.create_index(
+            self.env.cr, 'maintenance_location_parent_path_prefix_index', self._table,
+            ['parent_path text_pattern_ops'],
+        )
+    
+    # -------------------------------------------------------------------------
+    # CONSTRAINT METHODS
+    # -------------------------------------------------------------------------
+    
+    @api.constrains('parent_id')
+    def _check_parent_recursion(self):
+        """Prevent cycles in the location tree"""
+        if not self._check_recursion():
+            raise ValidationError("A location cannot be inside itself or one of its sub-locations.")
+    
+    # -------------------------------------------------------------------------
+    # FIND OR CREATE
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _normalize_path(self, path):
+        """Split a free-text location into trimmed level names"""
+        parts = [re.sub(r'\s+', ' ', part).strip() for part in (path or '').split(LOCATION_SEPARATOR.strip())]
+        return [part for part in parts if part]
+    
+    @api.model
+    def _find_or_create(self, paths):
+        """Return {path: location} for free-text paths, creating missing levels
+        
+        Levels are separated by '/' and matched case-insensitively under
+        their parent. The existing levels of all the paths are resolved with
+        one recursive query; the missing ones are created a depth at a time.
+        """
+        pending = {path: self._normalize_path(path) for path in paths}
+        pending = {path: parts for path, parts in pending.items() if parts}
+        if not pending:
+            return {}
+        branches = sorted({tuple(parts) for parts in pending.values()})
+        wanted = [(branch, depth, name) for branch, parts in enumerate(branches) for depth, name in enumerate(parts)]
+        self.flush_model(['name', 'parent_id', 'active'])
+        self.env.cr.execute("""
+            WITH RECURSIVE wanted AS (
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::varchar[]) AS w(branch, depth, name)
+            ), walk AS (
+                SELECT w.branch, w.depth, l.id, l.parent_id, l.name
+                  FROM wanted w
+                  JOIN maintenance_location l
+                    ON l.parent_id IS NULL
+                   AND lower(l.name) = lower(w.name)
+                   AND l.active
+                 WHERE w.depth = 0
+                 UNION
+                SELECT w.branch, w.depth, l.id, l.parent_id, l.name
+                  FROM walk p
+                  JOIN wanted w
+                    ON w.branch = p.branch
+                   AND w.depth = p.depth + 1
+                  JOIN maintenance_location l
+                    ON l.parent_id = p.id
+                   AND lower(l.name) = lower(w.name)
+                   AND l.active
+            )
+            SELECT DISTINCT id, COALESCE(parent_id, 0), lower(name)
+              FROM walk
+          ORDER BY id
+        """, [list(column) for column in zip(*wanted)])
+        nodes = {}  # (parent id, lowercased name) -> location
+        for location_id, parent_id, name in self.env.cr.fetchall():
+            nodes.setdefault((parent_id or False, name), self.browse(location_id))
+        
+        result = {}
+        parents = {path: False for path in pending}
+        depth = 0
+        while pending:
+            to_create = {}
+            for path, parts in sorted(pending.items()):
+                key = (parents[path], parts[depth].lower())
+                if key not in nodes:
+                    to_create.setdefault(key, parts[depth])
+            if to_create:
+                created = self.create([{'name': name, 'parent_id': key[0]} for key, name in to_create.items()])
+                nodes.update(zip(to_create, created))
+            for path, parts in list(pending.items()):
+                location = nodes[(parents[path], parts[depth].lower())]
+                if depth + 1 == len(parts):
+                    result[path] = location
+                    del pending[path]
+                else:
+                    parents[path] = location.id
+            depth += 1
+        return result
+    
+    @api.model
+    def name_create(self, name):
+        """Quick-create a whole path (e.g., Building A / Floor 2) at once"""
+        location = self._find_or_create([name]).get(name)
+        if not location:
+            return super().name_create(name)
+        return location.id, location.display_name
+    
+    # -------------------------------------------------------------------------
+    # ACTIONS
+    # -------------------------------------------------------------------------
+    
+    def action_view_equipment(self):
+        """Open the equipment of this location and its sub-locations"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Equipment - {self.complete_name}',
+            'res_model': 'equipment.equipment',
+            'view_mode': 'tree,kanban,form',
+            'domain': [('location_id', 'child_of', self.id)],
+            'context': {'default_location_id': self.id},
+        }
+    
+    def action_view_work_centers(self):
+        """Open the work centers of this location and its sub-locations"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Work Centers - {self.complete_name}',
+            'res_model': 'maintenance.work.center',
+            'view_mode': 'tree,kanban,form',
+            'domain': [('location_id', 'child_of', self.id)],
+            'context': {'default_location_id': self.id},
+        }
+
+
+class GearGuardLocationMixin(models.AbstractModel):
+    """Location Mixin
+    
+    Structured location of equipment and work centers. ``location`` keeps
+    the full path as text for lists, exports and devices; typing a path in
+    it selects the matching location, creating the missing levels.
+    """
+    _name = 'gearguard.location.mixin'
+    _description = 'GearGuard Location Mixin'
+    
+    location_id = fields.Many2one(
+        'maintenance.location',
+        string='Location',
+        index=True,
+        tracking=True,
+        ondelete='restrict',
+        help="Site, building, floor or room"
+    )
+    
+    location = fields.Char(
+        string='Location Path',
+        compute='_compute_location',
+        inverse='_inverse_location',
+        store=True,
+        help="Full path of the location (e.g., Building A / Floor 2 / Room 101)"
+    )
+    
+    @api.depends('location_id.complete_name')
+    def _compute_location(self):
+        """Mirror the full path of the location"""
+        for record in self:
+            record.location = record.location_id.complete_name or False
+    
+    def _inverse_location(self):
+        """Select or create the locations typed as text, in one batch"""
+        locations = self.env['maintenance.location']._find_or_create({
+            record.location for record in self if record.location
+        })
+        for record in self:
+            record.location_id = locations.get(record.location, False)
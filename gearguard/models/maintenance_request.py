@@ -1,9 +1,36 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+import logging
+
+import psycopg2
+from markupsafe import Markup
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import sql, SQL
 from datetime import timedelta
 
+_logger = logging.getLogger(__name__)
+
+# Fields whose change can create or resolve a technician double-booking
+SCHEDULE_FIELDS = {'technician_id', 'scheduled_date', 'duration', 'stage_id', 'active'}
+
+# Time span of a booking: half-open so back-to-back bookings do not clash,
+# closed when it has no duration (an empty range would never overlap)
+BOOKING_SPAN = (
+    "tsrange({alias}scheduled_date, {alias}scheduled_end, "
+    "CASE WHEN {alias}scheduled_end > {alias}scheduled_date THEN '[)' ELSE '[]' END)"
+)
+
+# Fields selecting the SLA policy of a request
+SLA_FIELDS = {'priority', 'maintenance_team_id', 'equipment_id'}
+
+# Request fields feeding the next/last maintenance dates of the equipment
+MAINTENANCE_DATE_FIELDS = {'equipment_id', 'scheduled_date', 'close_date', 'stage_id', 'active'}
+
+# Request fields feeding the open hours of the work centers (overload routing)
+ROUTING_LOAD_FIELDS = {'work_center_id', 'duration', 'stage_id', 'active'}
+
 
 class MaintenanceRequest(models.Model):
     """Maintenance Request Model
@@ -13,10 +40,40 @@ class MaintenanceRequest(models.Model):
     """
     _name = 'maintenance.request'
     _description = 'Maintenance Request'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'gearguard.export.mixin', 'gearguard.sync.mixin',
+                'gearguard.reporting.mixin']
     _order = 'priority desc, scheduled_date asc, id desc'
     _rec_name = 'name'
     _rec_names_search = ['name', 'equipment_id']
+    
+    _gearguard_export_fields = [
+        ('id', 'ID'),
+        ('name', 'Subject'),
+        ('request_type', 'Request Type'),
+        ('priority', 'Priority'),
+        ('stage_id.name', 'Stage'),
+        ('equipment_id.name', 'Equipment'),
+        ('equipment_id.serial_number', 'Serial Number'),
+        ('category_id.name', 'Equipment Category'),
+        ('maintenance_team_id.name', 'Maintenance Team'),
+        ('technician_id.name', 'Assigned Technician'),
+        ('work_center_id.name', 'Work Center'),
+        ('request_date', 'Request Date'),
+        ('scheduled_date', 'Scheduled Date'),
+        ('deadline', 'Deadline'),
+        ('close_date', 'Close Date'),
+        ('duration', 'Duration (Hours)'),
+        ('estimated_cost', 'Estimated Cost'),
+        ('actual_cost', 'Actual Cost'),
+    ]
+    
+    _gearguard_sync_fields = [
+        'name', 'request_type', 'priority', 'stage_id', 'kanban_state',
+        'equipment_id', 'maintenance_team_id', 'technician_id',
+        'scheduled_date', 'duration', 'deadline', 'description',
+    ]
+    _gearguard_sync_writable_fields = ['stage_id', 'kanban_state', 'duration', 'description']
+    _gearguard_sync_scope_fields = ['active', 'stage_id', 'technician_id', 'maintenance_team_id']
 
     # -------------------------------------------------------------------------
     # BASIC FIELDS
@@ -68,6 +125,7 @@ class MaintenanceRequest(models.Model):
         'equipment.equipment',
         string='Equipment',
         required=True,
+        index=True,
         tracking=True,
         help="Which machine/equipment is affected?"
     )
@@ -94,6 +152,15 @@ class MaintenanceRequest(models.Model):
         readonly=True
     )
     
+    location_id = fields.Many2one(
+        'maintenance.location',
+        string='Equipment Location',
+        related='equipment_id.location_id',
+        store=True,
+        index=True,
+        help="Stored for grouping and subtree filters on requests"
+    )
+    
     # -------------------------------------------------------------------------
     # WORK CENTER (FROM MOCKUP)
     # -------------------------------------------------------------------------
@@ -106,6 +173,14 @@ class MaintenanceRequest(models.Model):
         help="Work center where the maintenance will be performed"
     )
     
+    rerouted_from_id = fields.Many2one(
+        'maintenance.work.center',
+        string='Rerouted From',
+        readonly=True,
+        copy=False,
+        help="Overloaded work center this request was originally aimed at"
+    )
+    
     # -------------------------------------------------------------------------
     # TEAM & ASSIGNMENT
     # -------------------------------------------------------------------------
@@ -119,8 +194,16 @@ class MaintenanceRequest(models.Model):
     )
     
     team_member_ids = fields.Many2many(
-        related='maintenance_team_id.member_ids',
-        string='Team Members'
+        'res.users',
+        string='Team Members',
+        compute='_compute_team_member_ids'
+    )
+    
+    is_my_team = fields.Boolean(
+        string='In My Teams',
+        compute='_compute_is_my_team',
+        search='_search_is_my_team',
+        help="True if the request belongs to one of the current user's teams"
     )
     
     technician_id = fields.Many2one(
@@ -151,12 +234,27 @@ class MaintenanceRequest(models.Model):
         help="Current stage of the request"
     )
     
+    is_closed = fields.Boolean(
+        string='Closed',
+        related='stage_id.is_closed',
+        store=True,
+        help="Stored copy of the stage's closed flag, used by partial indexes"
+    )
+    
     kanban_state = fields.Selection([
         ('normal', 'In Progress'),
         ('done', 'Ready'),
         ('blocked', 'Blocked'),
     ], string='Kanban State', default='normal', tracking=True)
     
+    occurrence_count = fields.Integer(
+        string='Occurrences',
+        default=1,
+        readonly=True,
+        copy=False,
+        help="Number of fault reports coalesced into this request"
+    )
+    
     # -------------------------------------------------------------------------
     # SCHEDULING & TIME
     # -------------------------------------------------------------------------
@@ -175,9 +273,25 @@ class MaintenanceRequest(models.Model):
         help="When should the maintenance happen?"
     )
     
+    scheduled_end = fields.Datetime(
+        string='Scheduled End',
+        compute='_compute_scheduled_end',
+        store=True,
+        index=True,
+        help="Scheduled date plus duration; end of the technician's booking"
+    )
+    
+    schedule_conflict = fields.Boolean(
+        string='Double-Booked',
+        readonly=True,
+        copy=False,
+        help="The assigned technician has another open request overlapping this time slot"
+    )
+    
     deadline = fields.Date(
         string='Deadline',
         tracking=True,
+        index=True,
         help="Due date for completion"
     )
     
@@ -232,6 +346,75 @@ class MaintenanceRequest(models.Model):
         default=lambda self: self.env.company.currency_id.id
     )
     
+    # -------------------------------------------------------------------------
+    # SPARE PARTS
+    # -------------------------------------------------------------------------
+    
+    part_line_ids = fields.One2many(
+        'maintenance.part.line',
+        'request_id',
+        string='Spare Parts',
+        help="Spare parts used for this repair; taken from stock when the request is closed"
+    )
+    
+    parts_cost = fields.Float(
+        string='Parts Cost',
+        digits='Product Price',
+        compute='_compute_parts_cost',
+        store=True
+    )
+    
+    # -------------------------------------------------------------------------
+    # SERVICE LEVEL (SLA)
+    # -------------------------------------------------------------------------
+    
+    sla_policy_id = fields.Many2one(
+        'maintenance.sla.policy',
+        string='SLA Policy',
+        readonly=True,
+        copy=False,
+        help="Policy matched on priority, team and equipment category"
+    )
+    
+    sla_response_due = fields.Datetime(
+        string='Response Due',
+        readonly=True,
+        copy=False
+    )
+    
+    sla_resolution_due = fields.Datetime(
+        string='Resolution Due',
+        readonly=True,
+        copy=False
+    )
+    
+    date_responded = fields.Datetime(
+        string='Responded On',
+        readonly=True,
+        copy=False,
+        help="When the request first left its initial stage"
+    )
+    
+    sla_breached = fields.Selection([
+        ('response', 'Response Breached'),
+        ('resolution', 'Resolution Breached'),
+    ], string='SLA Breach', readonly=True, copy=False,
+        help="Set by the SLA watcher when a target is missed; a resolution breach shows over a response one")
+    
+    sla_response_breached_on = fields.Datetime(
+        string='Response Breached On',
+        readonly=True,
+        copy=False,
+        help="When the SLA watcher found the response target missed"
+    )
+    
+    sla_resolution_breached_on = fields.Datetime(
+        string='Resolution Breached On',
+        readonly=True,
+        copy=False,
+        help="When the SLA watcher found the resolution target missed"
+    )
+    
     # -------------------------------------------------------------------------
     # COMPUTED STATUS FIELDS
     # -------------------------------------------------------------------------
@@ -245,7 +428,9 @@ class MaintenanceRequest(models.Model):
     
     days_until_deadline = fields.Integer(
         string='Days Until Deadline',
-        compute='_compute_days_until_deadline'
+        compute='_compute_days_until_deadline',
+        search='_search_days_until_deadline',
+        help="Searchable and sortable: translated into indexed deadline ranges"
     )
     
     # -------------------------------------------------------------------------
@@ -265,14 +450,139 @@ class MaintenanceRequest(models.Model):
     @api.constrains('technician_id', 'maintenance_team_id')
     def _check_technician_in_team(self):
         """Ensure technician is a member of the assigned maintenance team"""
+        Team = self.env['maintenance.team']
         for request in self:
             if request.technician_id and request.maintenance_team_id:
-                if request.technician_id not in request.maintenance_team_id.member_ids:
+                if request.technician_id.id not in Team._get_team_member_ids(request.maintenance_team_id.id):
                     raise ValidationError(
                         f"Technician '{request.technician_id.name}' is not a member of team "
                         f"'{request.maintenance_team_id.name}'. Only team members can be assigned to requests."
                     )
     
+    # -------------------------------------------------------------------------
+    # ORDERING
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def fields_get(self, allfields=None, attributes=None):
+        """Let list views sort on days_until_deadline"""
+        res = super().fields_get(allfields, attributes)
+        if 'days_until_deadline' in res and (not attributes or 'sortable' in attributes):
+            res['days_until_deadline']['sortable'] = True
+        return res
+    
+    def _order_field_to_sql(self, alias, field_name, direction, nulls, query):
+        """Order by days_until_deadline through the indexed deadline column"""
+        if field_name == 'days_until_deadline':
+            return SQL("%s %s %s", SQL.identifier(alias, 'deadline'), direction, nulls)
+        return super()._order_field_to_sql(alias, field_name, direction, nulls, query)
+    
+    # -------------------------------------------------------------------------
+    # DATABASE INDEXES
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Create the indexes backing overlap checks and open-request probes"""
+        super().init()
+        self._init_technician_span_index()
+        sql.create_index(
+            self.env.cr, 'maintenance_request_open_corrective_index', self._table,
+            ['equipment_id', 'id'],
+            where="request_type = 'corrective' AND active AND is_closed IS NOT TRUE",
+        )
+        # SLA watcher: only open, not yet breached requests are ever scanned
+        for old_index in ('maintenance_request_sla_response_open_index',
+                          'maintenance_request_sla_resolution_open_index'):
+            sql.drop_index(self.env.cr, old_index, self._table)
+        sql.create_index(
+            self.env.cr, 'maintenance_request_sla_response_pending_index', self._table,
+            ['sla_response_due'],
+            where="sla_response_due IS NOT NULL AND date_responded IS NULL "
+                  "AND sla_response_breached_on IS NULL AND active AND is_closed IS NOT TRUE",
+        )
+        sql.create_index(
+            self.env.cr, 'maintenance_request_sla_resolution_pending_index', self._table,
+            ['sla_resolution_due'],
+            where="sla_resolution_due IS NOT NULL AND sla_resolution_breached_on IS NULL "
+                  "AND active AND is_closed IS NOT TRUE",
+        )
+    
+    def _init_technician_span_index(self):
+        """Create the (technician, time span) index used for overlap checks"""
+        cr = self.env.cr
+        # Superseded by the BOOKING_SPAN expression, which keeps zero-length bookings
+        sql.drop_index(cr, 'maintenance_request_technician_span_index', self._table)
+        indexname = 'maintenance_request_technician_booking_index'
+        if sql.index_exists(cr, indexname):
+            return
+        where = 'technician_id IS NOT NULL AND scheduled_date IS NOT NULL'
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except psycopg2.Error:
+            _logger.warning(
+                "btree_gist extension unavailable, falling back to a btree index "
+                "for technician booking overlap checks"
+            )
+            sql.create_index(cr, indexname, self._table,
+                             ['technician_id', 'scheduled_date', 'scheduled_end'], where=where)
+        else:
+            sql.create_index(cr, indexname, self._table,
+                             ['technician_id', BOOKING_SPAN.format(alias='')],
+                             method='gist', where=where)
+    
+    # -------------------------------------------------------------------------
+    # DOUBLE-BOOKING DETECTION
+    # -------------------------------------------------------------------------
+    
+    def _refresh_schedule_conflicts(self, technician_ids):
+        """Recompute schedule_conflict for the given technicians and for self
+        
+        Each candidate booking is checked with one indexed overlap probe
+        (technician_id, tsrange) and only rows whose flag changes are updated.
+        """
+        technician_ids = tuple({tid for tid in technician_ids if tid})
+        if not technician_ids and not self:
+            return
+        self.flush_model(['technician_id', 'scheduled_date', 'scheduled_end',
+                          'stage_id', 'active', 'schedule_conflict'])
+        self.env['maintenance.stage'].flush_model(['is_closed'])
+        self.env.cr.execute(f"""
+            UPDATE maintenance_request r
+               SET schedule_conflict = c.conflict
+              FROM (
+                  SELECT b.id,
+                         (b.technician_id IS NOT NULL
+                          AND b.scheduled_date IS NOT NULL
+                          AND b.active
+                          AND bs.is_closed IS NOT TRUE
+                          AND EXISTS (
+                              SELECT 1
+                                FROM maintenance_request o
+                                LEFT JOIN maintenance_stage os ON os.id = o.stage_id
+                               WHERE o.technician_id = b.technician_id
+                                 AND o.scheduled_date IS NOT NULL
+                                 AND {BOOKING_SPAN.format(alias='o.')}
+                                     && {BOOKING_SPAN.format(alias='b.')}
+                                 AND o.id != b.id
+                                 AND o.active
+                                 AND os.is_closed IS NOT TRUE
+                          )) AS conflict
+                    FROM maintenance_request b
+                    LEFT JOIN maintenance_stage bs ON bs.id = b.stage_id
+                   WHERE (b.technician_id IN %s
+                          AND (b.schedule_conflict
+                               OR (b.scheduled_date IS NOT NULL AND b.active AND bs.is_closed IS NOT TRUE)))
+                      OR b.id IN %s
+              ) c
+             WHERE r.id = c.id
+               AND r.schedule_conflict IS DISTINCT FROM c.conflict
+         RETURNING r.id
+        """, [technician_ids or (0,), tuple(self.ids) or (0,)])
+        changed_ids = [row[0] for row in self.env.cr.fetchall()]
+        if changed_ids:
+            self.browse(changed_ids).invalidate_recordset(['schedule_conflict'])
+    
     # -------------------------------------------------------------------------
     # DEFAULT METHODS
     # -------------------------------------------------------------------------
@@ -290,6 +600,30 @@ class MaintenanceRequest(models.Model):
     # COMPUTE METHODS
     # -------------------------------------------------------------------------
     
+    @api.depends('maintenance_team_id', 'maintenance_team_id.member_ids')
+    def _compute_team_member_ids(self):
+        """Team members from the cached membership map"""
+        Team = self.env['maintenance.team']
+        for request in self:
+            member_ids = Team._get_team_member_ids(request.maintenance_team_id.id)
+            request.team_member_ids = [(6, 0, sorted(member_ids))]
+    
+    @api.depends('maintenance_team_id')
+    @api.depends_context('uid')
+    def _compute_is_my_team(self):
+        """Check the request team against the current user's cached teams"""
+        my_team_ids = self.env['maintenance.team']._get_user_team_ids(self.env.uid)
+        for request in self:
+            request.is_my_team = request.maintenance_team_id.id in my_team_ids
+    
+    def _search_is_my_team(self, operator, value):
+        """Translate 'In My Teams' into a plain maintenance_team_id domain"""
+        if operator not in ('=', '!='):
+            raise UserError(_("Unsupported operator for 'In My Teams': %s", operator))
+        my_team_ids = list(self.env['maintenance.team']._get_user_team_ids(self.env.uid))
+        positive = (operator == '=') == bool(value)
+        return [('maintenance_team_id', 'in' if positive else 'not in', my_team_ids)]
+    
     @api.depends('scheduled_date', 'reminder_days')
     def _compute_reminder_date(self):
         """Compute reminder date based on scheduled date and reminder days"""
@@ -299,6 +633,21 @@ class MaintenanceRequest(models.Model):
             else:
                 request.reminder_date = False
     
+    @api.depends('scheduled_date', 'duration')
+    def _compute_scheduled_end(self):
+        """Compute the end of the booking from scheduled date and duration"""
+        for request in self:
+            if request.scheduled_date:
+                request.scheduled_end = request.scheduled_date + timedelta(hours=request.duration or 0.0)
+            else:
+                request.scheduled_end = False
+    
+    @api.depends('part_line_ids.subtotal')
+    def _compute_parts_cost(self):
+        """Compute total cost of the spare parts used"""
+        for request in self:
+            request.parts_cost = sum(request.part_line_ids.mapped('subtotal'))
+    
     @api.depends('deadline', 'stage_id.is_closed')
     def _compute_is_overdue(self):
         """Check if request is overdue"""
@@ -319,6 +668,21 @@ class MaintenanceRequest(models.Model):
             else:
                 request.days_until_deadline = 0
     
+    def _search_days_until_deadline(self, operator, value):
+        """Translate a days-until-deadline condition into a deadline range
+        
+        ``days_until_deadline <op> N`` is ``deadline <op> today + N``, which
+        the deadline index answers with a range scan. Requests without a
+        deadline never match a numeric condition (the ORM would otherwise
+        let them through ``!=``).
+        """
+        if operator not in ('=', '!=', '<', '<=', '>', '>='):
+            raise UserError(_("Unsupported operator for 'Days Until Deadline': %s", operator))
+        if value is False or value is None:
+            return [('deadline', operator, False)]
+        target = fields.Date.today() + timedelta(days=int(value))
+        return [('deadline', '!=', False), ('deadline', operator, target)]
+    
     # -------------------------------------------------------------------------
     # ONCHANGE METHODS - THE KEY AUTO-FILL LOGIC!
     # -------------------------------------------------------------------------
@@ -344,7 +708,8 @@ class MaintenanceRequest(models.Model):
     def _onchange_maintenance_team_id(self):
         """Reset technician if they're not in the new team"""
         if self.technician_id and self.maintenance_team_id:
-            if self.technician_id not in self.maintenance_team_id.member_ids:
+            member_ids = self.env['maintenance.team']._get_team_member_ids(self.maintenance_team_id.id)
+            if self.technician_id.id not in member_ids:
                 self.technician_id = False
     
     @api.onchange('request_type')
@@ -358,42 +723,573 @@ class MaintenanceRequest(models.Model):
     # CRUD OVERRIDES
     # -------------------------------------------------------------------------
     
+    @api.model
+    def _autofill_from_equipment(self, vals_list):
+        """AUTO-FILL team and technician from equipment, set-wise
+        
+        All referenced equipment is read in a single prefetch batch instead
+        of one browse per create value.
+        """
+        equipment_ids = {
+            vals['equipment_id'] for vals in vals_list
+            if vals.get('equipment_id') and not vals.get('maintenance_team_id')
+        }
+        if not equipment_ids:
+            return vals_list
+        equipments = self.env['equipment.equipment'].browse(sorted(equipment_ids))
+        defaults = {
+            equipment.id: (equipment.maintenance_team_id.id, equipment.technician_id.id)
+            for equipment in equipments
+        }
+        for vals in vals_list:
+            if vals.get('equipment_id') and not vals.get('maintenance_team_id'):
+                team_id, technician_id = defaults[vals['equipment_id']]
+                vals['maintenance_team_id'] = team_id
+                if technician_id and not vals.get('technician_id'):
+                    vals['technician_id'] = technician_id
+        return vals_list
+    
+    def _route_work_centers(self, vals_list):
+        """Redirect the vals aimed at overloaded work centers to alternates"""
+        if self.env.context.get('gearguard_no_reroute'):
+            return vals_list
+        routed = [vals for vals in vals_list if vals.get('work_center_id')]
+        if not routed:
+            return vals_list
+        chosen_ids = iter(self.env['maintenance.work.center']._route_requests([
+            (vals['work_center_id'], vals.get('duration') or 0.0) for vals in routed
+        ]))
+        result = []
+        for vals in vals_list:
+            if vals.get('work_center_id'):
+                routed_id = next(chosen_ids)
+                if routed_id != vals['work_center_id']:
+                    vals = dict(vals, work_center_id=routed_id, rerouted_from_id=vals['work_center_id'])
+            result.append(vals)
+        return result
+    
     @api.model_create_multi
     def create(self, vals_list):
         """Override create to handle auto-fill if not set"""
-        for vals in vals_list:
-            if vals.get('equipment_id') and not vals.get('maintenance_team_id'):
-                equipment = self.env['equipment.equipment'].browse(vals['equipment_id'])
-                vals['maintenance_team_id'] = equipment.maintenance_team_id.id
-                if equipment.technician_id and not vals.get('technician_id'):
-                    vals['technician_id'] = equipment.technician_id.id
-        return super().create(vals_list)
+        self.env['maintenance.dashboard']._invalidate_cache()
+        vals_list = self._autofill_from_equipment(vals_list)
+        if self._is_coalescing_enabled():
+            # Routed once, when the requests that are not merged get created
+            return self._create_coalesced(vals_list)[0]
+        vals_list = self._route_work_centers(vals_list)
+        requests = super().create(vals_list)
+        if requests.work_center_id:
+            self.env['maintenance.work.center']._invalidate_routing_cache()
+        self.env['maintenance.stage.transition']._log(
+            requests.ids, [None] * len(requests), [request.stage_id.id or None for request in requests],
+        )
+        requests._apply_sla_policies()
+        # Unscheduled open requests (e.g., ingested faults) neither book a
+        # technician nor move the maintenance dates of their equipment
+        dated = requests.filtered(lambda r: r.scheduled_date or r.close_date)
+        booked = dated.filtered(lambda r: r.technician_id and r.scheduled_date)
+        if booked:
+            booked._refresh_schedule_conflicts(booked.technician_id.ids)
+        if dated:
+            self.env['equipment.equipment']._refresh_maintenance_dates(dated.equipment_id.ids)
+        return requests
     
     def write(self, vals):
         """Override write to handle stage changes"""
-        # Handle scrap logic
+        # Follower e-mails from tracked fields go through the mail queue
+        # instead of being sent inside the user's transaction
+        self = self.with_context(mail_notify_force_send=False)
+        self.env['maintenance.dashboard']._invalidate_cache()
+        if ROUTING_LOAD_FIELDS.intersection(vals) and (vals.get('work_center_id') or self.work_center_id):
+            self.env['maintenance.work.center']._invalidate_routing_cache()
+        
+        # Assigning a work center goes through overload routing, request by
+        # request: the ones sent elsewhere are written on their own, first
+        if vals.get('work_center_id') and not self.env.context.get('gearguard_no_reroute'):
+            center_id = vals['work_center_id']
+            moving = self.filtered(lambda r: r.work_center_id.id != center_id)
+            routed = self._route_work_centers([
+                {'work_center_id': center_id, 'duration': vals.get('duration', request.duration)}
+                for request in moving
+            ])
+            rerouted = {}
+            for request, routed_vals in zip(moving, routed):
+                if routed_vals['work_center_id'] != center_id:
+                    rerouted.setdefault(routed_vals['work_center_id'], []).append(request.id)
+            for routed_id, request_ids in rerouted.items():
+                self.browse(request_ids).with_context(gearguard_no_reroute=True).write(
+                    dict(vals, work_center_id=routed_id, rerouted_from_id=center_id))
+            if rerouted:
+                self -= self.browse([rid for request_ids in rerouted.values() for rid in request_ids])
+                if not self:
+                    return True
+        
+        # Plain kanban moves only matter to scheduled bookings and leave the
+        # equipment writes (scrap, maintenance dates) to the job queue, so
+        # parallel moves never update shared rows
+        stage_move = set(vals) == {'stage_id'}
         if 'stage_id' in vals:
+            # Kanban drops onto the current column are no-ops: don't touch
+            # (and lock) rows that are already in the target stage
+            moved = self.filtered(lambda r: r.stage_id.id != vals['stage_id'])
+            if len(vals) == 1 and not moved:
+                return True
+            if len(vals) == 1:
+                self = moved
+            from_stage_ids = [request.stage_id.id or None for request in moved]
             new_stage = self.env['maintenance.stage'].browse(vals['stage_id'])
             
-            # If moving to SCRAP stage, mark equipment as scrapped
-            if new_stage.is_scrap:
-                for request in self:
-                    if request.equipment_id and not request.equipment_id.is_scrap:
-                        request.equipment_id.write({
-                            'is_scrap': True,
-                            'scrap_date': fields.Date.today(),
-                            'scrap_reason': f"Scrapped via maintenance request: {request.name}",
-                        })
-                        request.equipment_id.message_post(
-                            body=f"⚠️ Equipment marked as SCRAP based on maintenance request: {request.name}",
-                            message_type='notification'
-                        )
-            
             # If moving to closed stage, set close date
             if new_stage.is_closed and 'close_date' not in vals:
                 vals['close_date'] = fields.Date.today()
         
-        return super().write(vals)
+        # Re-check double-bookings for the technicians before and after the write
+        booked = self.filtered('scheduled_date') if stage_move else self
+        reschedule = bool(booked) and bool(SCHEDULE_FIELDS.intersection(vals))
+        technician_ids = set(booked.technician_id.ids) if reschedule else set()
+        # Same for the maintenance dates of the equipment before and after
+        redate = not stage_move and bool(MAINTENANCE_DATE_FIELDS.intersection(vals))
+        equipment_ids = set(self.equipment_id.ids) if redate else set()
+        res = super().write(vals)
+        if reschedule:
+            technician_ids.update(booked.technician_id.ids)
+            booked._refresh_schedule_conflicts(technician_ids)
+        if redate:
+            equipment_ids.update(self.equipment_id.ids)
+            self.env['equipment.equipment']._refresh_maintenance_dates(equipment_ids)
+        if stage_move:
+            moved._defer_equipment_updates(new_stage)
+        
+        # Log the stage moves for cycle time analytics
+        if 'stage_id' in vals:
+            self.env['maintenance.stage.transition']._log(
+                moved.ids, from_stage_ids, [vals['stage_id'] or None] * len(moved),
+            )
+            moved._mark_responded()
+        
+        # Re-select the SLA when its inputs change
+        if SLA_FIELDS.intersection(vals):
+            self._apply_sla_policies()
+        
+        # Take used spare parts from stock when the request is closed
+        if 'stage_id' in vals and new_stage.is_closed:
+            self.part_line_ids._consume()
+        return res
+    
+    def _defer_equipment_updates(self, stage):
+        """Queue the equipment side effects of moving these requests to ``stage``
+        
+        One job per equipment, only when something changes for it: the move
+        scraps it, or the request is scheduled or closed (its maintenance
+        dates move). The job writes the equipment row in its own short
+        transaction, see Equipment._apply_request_stage.
+        """
+        by_equipment = {}
+        for request in self.sorted('id'):
+            if request.equipment_id and (stage.is_scrap or request.scheduled_date or request.close_date):
+                by_equipment.setdefault(request.equipment_id, request)
+        Job = self.env['gearguard.job']
+        for equipment, request in by_equipment.items():
+            Job._enqueue(equipment, '_apply_request_stage', scrap_request=stage.is_scrap and request.name)
+    
+    def unlink(self):
+        """Release the deleted bookings of their technicians and equipment"""
+        technician_ids = self.technician_id.ids
+        equipment_ids = self.equipment_id.ids
+        self.env['maintenance.dashboard']._invalidate_cache()
+        if self.work_center_id:
+            self.env['maintenance.work.center']._invalidate_routing_cache()
+        res = super().unlink()
+        self.browse()._refresh_schedule_conflicts(technician_ids)
+        self.env['equipment.equipment']._refresh_maintenance_dates(equipment_ids)
+        return res
+    
+    # -------------------------------------------------------------------------
+    # OPEN-REQUEST COALESCING
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _is_coalescing_enabled(self):
+        """Dedupe mode: context key, falling back to a system parameter"""
+        if 'gearguard_coalesce' in self.env.context:
+            return bool(self.env.context['gearguard_coalesce'])
+        param = self.env['ir.config_parameter'].sudo().get_param('gearguard.coalesce_corrective')
+        return param in ('1', 'True', 'true')
+    
+    @api.model
+    def _find_open_corrective(self, equipment_ids):
+        """Map equipment id → its most recent open corrective request id
+        
+        One probe over the partial index on open corrective requests. Only
+        requests the user may write (access rights and record rules) are
+        returned: faults on the others create a request of their own.
+        """
+        if not equipment_ids:
+            return {}
+        self.flush_model(['equipment_id', 'request_type', 'active', 'is_closed'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (equipment_id) equipment_id, id
+              FROM maintenance_request
+             WHERE equipment_id IN %s
+               AND request_type = 'corrective'
+               AND active
+               AND is_closed IS NOT TRUE
+          ORDER BY equipment_id, id DESC
+        """, [tuple(equipment_ids)])
+        open_ids = dict(self.env.cr.fetchall())
+        if not open_ids or not self.check_access_rights('write', raise_exception=False):
+            return {}
+        writable_ids = set(self.browse(list(open_ids.values()))._filter_access_rules('write').ids)
+        return {
+            equipment_id: request_id
+            for equipment_id, request_id in open_ids.items()
+            if request_id in writable_ids
+        }
+    
+    @api.model
+    def _create_coalesced(self, vals_list):
+        """Create requests, merging repeated corrective faults per equipment
+        
+        A corrective value whose equipment already has an open corrective
+        request (or an earlier value in the same batch) is merged into it
+        instead of creating a duplicate. Returns the resulting requests in
+        input order and a parallel list of booleans telling which were merged.
+        """
+        default_type = self.env.context.get('default_request_type', 'corrective')
+        
+        def is_corrective(vals):
+            return vals.get('equipment_id') and vals.get('request_type', default_type) == 'corrective'
+        
+        open_ids = self._find_open_corrective({
+            vals['equipment_id'] for vals in vals_list if is_corrective(vals)
+        })
+        to_create = []
+        plan = []
+        new_index_by_equipment = {}
+        for vals in vals_list:
+            equipment_id = vals.get('equipment_id')
+            if is_corrective(vals):
+                if equipment_id in open_ids:
+                    plan.append(('merge_existing', open_ids[equipment_id], vals))
+                    continue
+                if equipment_id in new_index_by_equipment:
+                    plan.append(('merge_new', new_index_by_equipment[equipment_id], vals))
+                    continue
+                new_index_by_equipment[equipment_id] = len(to_create)
+            plan.append(('create', len(to_create), vals))
+            to_create.append(vals)
+        
+        created = self.with_context(gearguard_coalesce=False).create(to_create) if to_create else self.browse()
+        created_ids = created.ids
+        result_ids = []
+        merged = []
+        occurrences = {}
+        for kind, target, vals in plan:
+            if kind == 'create':
+                result_ids.append(created_ids[target])
+                merged.append(False)
+                continue
+            target_id = target if kind == 'merge_existing' else created_ids[target]
+            occurrences.setdefault(target_id, []).append(vals)
+            result_ids.append(target_id)
+            merged.append(True)
+        if occurrences:
+            self._merge_occurrences(occurrences)
+        return self.browse(result_ids), merged
+    
+    @api.model
+    def _merge_occurrences(self, occurrences):
+        """Apply repeated faults to their open requests in one UPDATE
+        
+        :param occurrences: dict target request id → list of create values
+        Bumps occurrence_count, appends a note per occurrence to the
+        description and raises the priority one level (never below the
+        incoming priority).
+        """
+        now = fields.Datetime.to_string(fields.Datetime.now())
+        ids, counts, priorities, notes = [], [], [], []
+        for target_id, vals_list in occurrences.items():
+            ids.append(target_id)
+            counts.append(len(vals_list))
+            priorities.append(max(vals.get('priority') or '0' for vals in vals_list))
+            notes.append(''.join(
+                Markup('<p><strong>%s</strong> — %s</p>%s') % (
+                    _("Repeated fault (%s)", now),
+                    vals.get('name') or '',
+                    Markup(tools.html_sanitize(vals.get('description') or '')),
+                )
+                for vals in vals_list
+            ))
+        self.flush_model(['occurrence_count', 'priority', 'description'])
+        self.env.cr.execute("""
+            UPDATE maintenance_request r
+               SET occurrence_count = COALESCE(r.occurrence_count, 1) + v.n,
+                   priority = GREATEST(v.priority, LEAST(COALESCE(r.priority, '0')::int + 1, 3)::varchar),
+                   description = COALESCE(r.description, '') || v.note,
+                   write_uid = %s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::int[], %s::varchar[], %s::text[]) AS v(id, n, priority, note)
+             WHERE r.id = v.id
+        """, [self.env.uid, ids, counts, priorities, notes])
+        self.browse(ids).invalidate_recordset(
+            ['occurrence_count', 'priority', 'description', 'write_uid', 'write_date'])
+        # The raised priority may select another SLA policy
+        self.browse(ids)._apply_sla_policies()
+    
+    # -------------------------------------------------------------------------
+    # MACHINE FAULT INGESTION
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _prepare_fault_vals(self, event, equipment):
+        """Build create values for one machine fault event"""
+        fault_code = event.get('fault_code')
+        name = event.get('name') or (
+            _("Fault %(code)s on %(equipment)s", code=fault_code, equipment=equipment.name)
+            if fault_code else _("Fault on %s", equipment.name)
+        )
+        vals = {
+            'name': name,
+            'equipment_id': equipment.id,
+            'request_type': 'corrective',
+        }
+        if event.get('description'):
+            vals['description'] = tools.plaintext2html(event['description'])
+        if event.get('priority') in dict(self._fields['priority'].selection):
+            vals['priority'] = event['priority']
+        return vals
+    
+    @api.model
+    def _create_fault_requests(self, vals_list, coalesce):
+        """Create (or coalesce) fault requests; returns (requests, merged flags)"""
+        if coalesce:
+            return self.with_context(gearguard_coalesce=True)._create_coalesced(vals_list)
+        return self.with_context(gearguard_coalesce=False).create(vals_list), [False] * len(vals_list)
+    
+    @api.model
+    def ingest_fault_events(self, events, coalesce=True):
+        """Create corrective requests for a batch of machine fault events
+        
+        Each event is a dict keyed by equipment ``serial`` with optional
+        ``fault_code``, ``name``, ``description``, ``priority`` and ``ref``.
+        Equipment is resolved with a single query and requests are created
+        with one batched create; with ``coalesce`` repeated faults are merged
+        into the equipment's open corrective request. Returns one result per
+        event, in order.
+        """
+        serials = {event.get('serial') for event in events if event.get('serial')}
+        equipment_by_serial = {
+            equipment.serial_number: equipment
+            for equipment in self.env['equipment.equipment'].search([('serial_number', 'in', list(serials))])
+        }
+        
+        results = []
+        pending = []
+        for index, event in enumerate(events):
+            result = {'index': index, 'ref': event.get('ref')}
+            results.append(result)
+            equipment = equipment_by_serial.get(event.get('serial'))
+            if not equipment:
+                result.update(status='error', error=_("Unknown equipment serial: %s", event.get('serial')))
+            elif equipment.is_scrap:
+                result.update(status='error', error=_("Equipment %s is scrapped", equipment.name))
+            else:
+                pending.append((result, self._prepare_fault_vals(event, equipment)))
+        if not pending:
+            return results
+        
+        Request = self.with_context(
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            mail_notrack=True,
+        )
+        try:
+            with self.env.cr.savepoint():
+                requests, merged = Request._create_fault_requests([vals for __, vals in pending], coalesce)
+        except Exception:
+            # Fall back to one savepoint per event to report individual failures
+            for result, vals in pending:
+                try:
+                    with self.env.cr.savepoint():
+                        requests, merged = Request._create_fault_requests([vals], coalesce)
+                    result.update(status='merged' if merged[0] else 'created', request_id=requests.id)
+                except Exception as e:
+                    result.update(status='error', error=str(e))
+        else:
+            for (result, __), request, is_merged in zip(pending, requests, merged):
+                result.update(status='merged' if is_merged else 'created', request_id=request.id)
+        return results
+    
+    # -------------------------------------------------------------------------
+    # SERVICE LEVEL (SLA)
+    # -------------------------------------------------------------------------
+    
+    def _apply_sla_policies(self):
+        """Match the SLA policy of the requests and stamp their due dates
+        
+        Targets count working hours from the request creation, on the
+        policy's calendar, else the work center's, else the company's.
+        Policies are matched once per (priority, team, category) and due
+        dates planned once per (policy, calendar, start), so a batch created
+        together (e.g., ingested faults) plans each target once. Everything
+        is written back with one UPDATE; breach flags are reset and
+        re-evaluated by the watcher.
+        """
+        if not self:
+            return
+        policies = self.env['maintenance.sla.policy'].sudo().search([])
+        Policy = self.env['maintenance.sla.policy']
+        matches = {}  # (priority, team id, category id) -> policy
+        plans = {}  # (policy, calendar, start) -> (response due, resolution due)
+        now = fields.Datetime.now()
+        rows = []
+        for request in self:
+            match_key = (request.priority, request.maintenance_team_id.id, request.category_id.id)
+            if match_key not in matches:
+                matches[match_key] = policies._match(*match_key)
+            policy = matches[match_key]
+            start = request.create_date or now
+            calendar = (
+                policy.resource_calendar_id
+                or request.work_center_id.resource_calendar_id
+                or self.env.company.resource_calendar_id
+            ) if policy else False
+            plan_key = (policy, calendar, start)
+            if plan_key not in plans:
+                plans[plan_key] = (
+                    policy and Policy._plan(calendar, start, policy.response_hours) or None,
+                    policy and Policy._plan(calendar, start, policy.resolution_hours) or None,
+                )
+            rows.append((request.id, policy.id or None, *plans[plan_key]))
+        sla_fields = ['sla_policy_id', 'sla_response_due', 'sla_resolution_due', 'sla_breached',
+                      'sla_response_breached_on', 'sla_resolution_breached_on']
+        self.flush_recordset(sla_fields)
+        ids, policy_ids, response_dues, resolution_dues = zip(*rows)
+        self.env.cr.execute("""
+            UPDATE maintenance_request r
+               SET sla_policy_id = v.policy_id,
+                   sla_response_due = v.response_due,
+                   sla_resolution_due = v.resolution_due,
+                   sla_breached = NULL,
+                   sla_response_breached_on = NULL,
+                   sla_resolution_breached_on = NULL
+              FROM unnest(%s::int[], %s::int[], %s::timestamp[], %s::timestamp[])
+                   AS v(id, policy_id, response_due, resolution_due)
+             WHERE r.id = v.id
+               AND (r.sla_policy_id IS DISTINCT FROM v.policy_id
+                    OR r.sla_response_due IS DISTINCT FROM v.response_due
+                    OR r.sla_resolution_due IS DISTINCT FROM v.resolution_due)
+        """, [list(ids), list(policy_ids), list(response_dues), list(resolution_dues)])
+        self.invalidate_recordset(sla_fields)
+    
+    def _mark_responded(self):
+        """Stamp the first response of requests leaving their initial stage"""
+        if not self:
+            return
+        self.flush_recordset(['date_responded'])
+        self.env.cr.execute("""
+            UPDATE maintenance_request
+               SET date_responded = now() at time zone 'UTC'
+             WHERE id IN %s
+               AND date_responded IS NULL
+        """, [tuple(self.ids)])
+        self.invalidate_recordset(['date_responded'])
+    
+    @api.model
+    def _cron_check_sla(self, batch_size=1000):
+        """Flag SLA breaches and escalate them, in batches
+        
+        Each batch claims overdue rows through the partial indexes on open,
+        not yet breached requests (so the scan never grows with history),
+        stamps the breach of each target in its own column with the
+        claiming UPDATE itself (a resolution breach never hides a response
+        one) and creates the escalation activities in one create call. Also flips is_overdue
+        on requests whose deadline passed since they were last written.
+        """
+        self.flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            UPDATE maintenance_request
+               SET is_overdue = TRUE
+             WHERE deadline < %s
+               AND is_overdue IS NOT TRUE
+               AND active
+               AND is_closed IS NOT TRUE
+        """, [fields.Date.context_today(self)])
+        cr.commit()
+        
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        checks = [
+            ('response', 'sla_response_due', 'sla_response_breached_on',
+             "date_responded IS NULL AND sla_response_breached_on IS NULL"),
+            ('resolution', 'sla_resolution_due', 'sla_resolution_breached_on',
+             "sla_resolution_breached_on IS NULL"),
+        ]
+        for breach, due_column, breached_column, pending in checks:
+            while True:
+                cr.execute(f"""
+                    UPDATE maintenance_request
+                       SET {breached_column} = now() at time zone 'UTC',
+                           sla_breached = CASE WHEN sla_breached = 'resolution' THEN sla_breached ELSE %s END
+                     WHERE id IN (
+                            SELECT id
+                              FROM maintenance_request
+                             WHERE {due_column} < now() at time zone 'UTC'
+                               AND {due_column} IS NOT NULL
+                               AND {pending}
+                               AND active
+                               AND is_closed IS NOT TRUE
+                          ORDER BY {due_column}
+                             LIMIT %s
+                               FOR UPDATE SKIP LOCKED
+                           )
+                 RETURNING id
+                """, [breach, batch_size])
+                ids = [row[0] for row in cr.fetchall()]
+                if not ids:
+                    break
+                requests = self.browse(ids)
+                requests.invalidate_recordset(['sla_breached', breached_column])
+                if activity_type:
+                    label = dict(self._fields['sla_breached'].selection)[breach]
+                    self.env['mail.activity'].create([{
+                        'activity_type_id': activity_type.id,
+                        'res_model_id': res_model_id,
+                        'res_id': request.id,
+                        'user_id': (
+                            request.sla_policy_id.escalation_user_id
+                            or request.maintenance_team_id.team_leader_id
+                            or request.technician_id
+                            or self.env.user
+                        ).id,
+                        'summary': f"{label}: {request.sla_policy_id.name}",
+                        'date_deadline': fields.Date.context_today(self),
+                    } for request in requests])
+                cr.commit()
+                self.env.invalidate_all()
+    
+    # -------------------------------------------------------------------------
+    # OFFLINE SYNC
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _gearguard_sync_domain(self):
+        """Open requests assigned to the user or to one of the user's teams"""
+        my_team_ids = list(self.env['maintenance.team']._get_user_team_ids(self.env.uid))
+        return [
+            ('is_closed', '=', False),
+            '|', ('technician_id', '=', self.env.uid), ('maintenance_team_id', 'in', my_team_ids),
+        ]
+    
+    def _gearguard_sync_holders(self):
+        """Open requests are held through their technician and their team"""
+        return {
+            request.id: (request.technician_id.id, request.maintenance_team_id.id)
+            for request in self
+            if request.active and not request.is_closed
+            and (request.technician_id or request.maintenance_team_id)
+        }
     
     # -------------------------------------------------------------------------
     # ACTIONS
@@ -402,7 +1298,8 @@ class MaintenanceRequest(models.Model):
     def action_assign_to_me(self):
         """Quick action: Assign request to current user"""
         self.ensure_one()
-        if self.env.user not in self.maintenance_team_id.member_ids:
+        member_ids = self.env['maintenance.team']._get_team_member_ids(self.maintenance_team_id.id)
+        if self.env.uid not in member_ids:
             raise UserError("You cannot assign yourself - you're not a member of the assigned team!")
         self.write({
             'technician_id': self.env.user.id,
@@ -424,6 +1321,11 @@ class MaintenanceRequest(models.Model):
             })
         return True
     
+    def action_consume_parts(self):
+        """Quick action: Take the listed spare parts from stock now"""
+        self.part_line_ids._consume()
+        return True
+    
     def action_open_equipment(self):
         """Open the linked equipment form"""
         self.ensure_one()
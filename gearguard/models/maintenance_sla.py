@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# Fields deciding which requests a policy applies to and their due dates
+POLICY_FIELDS = {
+    'active', 'sequence', 'priority', 'maintenance_team_id', 'category_id',
+    'response_hours', 'resolution_hours', 'resource_calendar_id',
+}
+
+
+class MaintenanceSlaPolicy(models.Model):
+    """Maintenance SLA Policy
+    
+    Response and resolution targets, in working hours, for the requests
+    matching a priority, team and/or equipment category. When several
+    policies match, the most specific one wins, then the lowest sequence.
+    """
+    _name = 'maintenance.sla.policy'
+    _description = 'Maintenance SLA Policy'
+    _order = 'sequence, id'
+    
+    name = fields.Char(
+        string='Policy Name',
+        required=True,
+        help="Name of the SLA (e.g., Urgent breakdowns - Production)"
+    )
+    
+    active = fields.Boolean(
+        string='Active',
+        default=True
+    )
+    
+    sequence = fields.Integer(
+        string='Sequence',
+        default=10
+    )
+    
+    # -------------------------------------------------------------------------
+    # SCOPE (EMPTY = ANY)
+    # -------------------------------------------------------------------------
+    
+    priority = fields.Selection([
+        ('0', 'Low'),
+        ('1', 'Normal'),
+        ('2', 'High'),
+        ('3', 'Urgent'),
+    ], string='Priority', help="Leave empty to apply to every priority")
+    
+    maintenance_team_id = fields.Many2one(
+        'maintenance.team',
+        string='Maintenance Team',
+        help="Leave empty to apply to every team"
+    )
+    
+    category_id = fields.Many2one(
+        'equipment.category',
+        string='Equipment Category',
+        help="Leave empty to apply to every category"
+    )
+    
+    # -------------------------------------------------------------------------
+    # TARGETS
+    # -------------------------------------------------------------------------
+    
+    response_hours = fields.Float(
+        string='Response Target (Hours)',
+        help="Working hours allowed before the request leaves its first stage. 0 = no target."
+    )
+    
+    resolution_hours = fields.Float(
+        string='Resolution Target (Hours)',
+        help="Working hours allowed before the request is closed. 0 = no target."
+    )
+    
+    resource_calendar_id = fields.Many2one(
+        'resource.calendar',
+        string='Working Hours',
+        help="Calendar used to count the targets. Defaults to the work center's "
+             "calendar, then the company's; without calendar hours run around the clock."
+    )
+    
+    escalation_user_id = fields.Many2one(
+        'res.users',
+        string='Escalate To',
+        help="User receiving breach activities; defaults to the team leader"
+    )
+    
+    _sql_constraints = [
+        ('response_hours_positive', 'CHECK(response_hours >= 0)', 'Response target cannot be negative!'),
+        ('resolution_hours_positive', 'CHECK(resolution_hours >= 0)', 'Resolution target cannot be negative!'),
+    ]
+    
+    # -------------------------------------------------------------------------
+    # CRUD METHODS
+    # -------------------------------------------------------------------------
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        policies = super().create(vals_list)
+        self._reapply_to_open_requests()
+        return policies
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if POLICY_FIELDS & set(vals):
+            self._reapply_to_open_requests()
+        return res
+    
+    def unlink(self):
+        res = super().unlink()
+        self._reapply_to_open_requests()
+        return res
+    
+    @api.model
+    def _reapply_to_open_requests(self):
+        """Re-match and re-plan the SLA of every open request"""
+        self.env['maintenance.request'].sudo().search([
+            ('is_closed', '=', False),
+        ])._apply_sla_policies()
+    
+    # -------------------------------------------------------------------------
+    # MATCHING & DUE DATES
+    # -------------------------------------------------------------------------
+    
+    def _match(self, priority, team_id, category_id):
+        """Most specific policy of ``self`` matching the given request values"""
+        candidates = self.filtered(lambda p: (
+            (not p.priority or p.priority == priority)
+            and (not p.maintenance_team_id or p.maintenance_team_id.id == team_id)
+            and (not p.category_id or p.category_id.id == category_id)
+        ))
+        if not candidates:
+            return self.browse()
+        return min(candidates, key=lambda p: (
+            -(bool(p.priority) + bool(p.maintenance_team_id) + bool(p.category_id)),
+            p.sequence,
+            p.id,
+        ))
+    
+    @api.model
+    def _plan(self, calendar, start, hours):
+        """Datetime ``hours`` working hours after ``start`` (naive UTC)"""
+        if not hours:
+            return False
+        if calendar:
+            due = calendar.plan_hours(hours, start, compute_leaves=True)
+            if due:
+                return due
+        return start + timedelta(hours=hours)
@@ -10,7 +10,10 @@ class MaintenanceStage(models.Model):
     """
     _name = 'maintenance.stage'
     _description = 'Maintenance Request Stage'
+    _inherit = ['gearguard.sync.mixin']
     _order = 'sequence, id'
+    
+    _gearguard_sync_fields = ['name', 'sequence', 'fold', 'is_closed', 'is_scrap']
 
     name = fields.Char(
         string='Stage Name',
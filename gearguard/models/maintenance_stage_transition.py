@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+from odoo.tools import sql
+
+
+class MaintenanceStageTransition(models.Model):
+    """Maintenance Stage Transition
+    
+    One narrow row per stage change of a request, written set-wise by
+    MaintenanceRequest.create/write. Feeds the cycle time report without
+    going through the chatter tracking values.
+    """
+    _name = 'maintenance.stage.transition'
+    _description = 'Maintenance Stage Transition'
+    _order = 'date desc, id desc'
+    _log_access = False
+    
+    request_id = fields.Many2one(
+        'maintenance.request',
+        string='Maintenance Request',
+        required=True,
+        ondelete='cascade'
+    )
+    
+    from_stage_id = fields.Many2one(
+        'maintenance.stage',
+        string='From Stage',
+        ondelete='set null'
+    )
+    
+    to_stage_id = fields.Many2one(
+        'maintenance.stage',
+        string='To Stage',
+        ondelete='set null'
+    )
+    
+    date = fields.Datetime(
+        string='Date',
+        required=True,
+        default=fields.Datetime.now
+    )
+    
+    user_id = fields.Many2one(
+        'res.users',
+        string='Moved By',
+        ondelete='set null'
+    )
+    
+    def init(self):
+        """Index the per-request timeline and seed it for existing requests"""
+        super().init()
+        sql.create_index(
+            self.env.cr, 'maintenance_stage_transition_request_date_index', self._table,
+            ['request_id', 'date', 'id'],
+        )
+        # First install: one entry transition per request, at its creation
+        self.env.cr.execute("""
+            INSERT INTO maintenance_stage_transition (request_id, from_stage_id, to_stage_id, date, user_id)
+            SELECT id, NULL, stage_id, create_date, create_uid
+              FROM maintenance_request
+             WHERE NOT EXISTS (SELECT 1 FROM maintenance_stage_transition)
+        """)
+    
+    @api.model
+    def _log(self, request_ids, from_stage_ids, to_stage_ids):
+        """Record the stage moves of many requests with one INSERT"""
+        if not request_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO maintenance_stage_transition (request_id, from_stage_id, to_stage_id, date, user_id)
+            SELECT t.request_id, t.from_stage_id, t.to_stage_id, now() at time zone 'UTC', %s
+              FROM unnest(%s::int[], %s::int[], %s::int[]) AS t(request_id, from_stage_id, to_stage_id)
+        """, [self.env.uid, list(request_ids), list(from_stage_ids), list(to_stage_ids)])
+
+
+class MaintenanceStageCycleReport(models.Model):
+    """Stage Cycle Time Report
+    
+    One row per stay of a request in a stage, with the time spent there and
+    the time elapsed since the request entered the workflow, computed with
+    window functions over the transition log.
+    """
+    _name = 'maintenance.stage.cycle.report'
+    _description = 'Maintenance Stage Cycle Time Report'
+    _inherit = ['gearguard.reporting.mixin']
+    _auto = False
+    _order = 'date_start desc'
+    
+    request_id = fields.Many2one('maintenance.request', string='Maintenance Request', readonly=True)
+    request_type = fields.Selection([
+        ('corrective', 'Corrective (Breakdown)'),
+        ('preventive', 'Preventive (Routine)'),
+    ], string='Request Type', readonly=True)
+    maintenance_team_id = fields.Many2one('maintenance.team', string='Maintenance Team', readonly=True)
+    category_id = fields.Many2one('equipment.category', string='Equipment Category', readonly=True)
+    work_center_id = fields.Many2one('maintenance.work.center', string='Work Center', readonly=True)
+    stage_id = fields.Many2one('maintenance.stage', string='Stage', readonly=True)
+    date_start = fields.Datetime(string='Entered Stage', readonly=True)
+    date_end = fields.Datetime(string='Left Stage', readonly=True)
+    is_current = fields.Boolean(string='Current Stage', readonly=True)
+    hours_in_stage = fields.Float(string='Hours in Stage', group_operator='avg', readonly=True)
+    hours_since_start = fields.Float(
+        string='Hours Since Creation', group_operator='avg', readonly=True,
+        help="Time from the first stage to entering this one (e.g., lead time to Repaired)",
+    )
+    nbr = fields.Integer(string='# Stays', readonly=True)
+    
+    def init(self):
+        """(Re)create the SQL view"""
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT t.id,
+                       t.request_id,
+                       r.request_type,
+                       r.maintenance_team_id,
+                       r.category_id,
+                       r.work_center_id,
+                       t.to_stage_id AS stage_id,
+                       t.date AS date_start,
+                       LEAD(t.date) OVER w AS date_end,
+                       LEAD(t.date) OVER w IS NULL AS is_current,
+                       EXTRACT(EPOCH FROM COALESCE(LEAD(t.date) OVER w, now() at time zone 'UTC') - t.date) / 3600.0
+                           AS hours_in_stage,
+                       EXTRACT(EPOCH FROM t.date - FIRST_VALUE(t.date) OVER w) / 3600.0 AS hours_since_start,
+                       1 AS nbr
+                  FROM maintenance_stage_transition t
+                  JOIN maintenance_request r ON r.id = t.request_id
+                WINDOW w AS (PARTITION BY t.request_id ORDER BY t.date, t.id)
+            )
+        """)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 
 
 class MaintenanceTeam(models.Model):
@@ -86,6 +86,66 @@ class MaintenanceTeam(models.Model):
         help="Number of open requests"
     )
     
+    # -------------------------------------------------------------------------
+    # MEMBERSHIP CACHE
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    @tools.ormcache()
+    def _get_membership_maps(self):
+        """Return (team_id → member user ids, user_id → team ids)
+        
+        Cached per registry and cleared whenever member_ids is written, so
+        membership checks in constraints, onchanges, domains and record
+        rules do not hit maintenance_team_users_rel in the common case.
+        """
+        self.flush_model(['member_ids'])
+        self.env.cr.execute("SELECT team_id, user_id FROM maintenance_team_users_rel")
+        team_members = {}
+        user_teams = {}
+        for team_id, user_id in self.env.cr.fetchall():
+            team_members.setdefault(team_id, set()).add(user_id)
+            user_teams.setdefault(user_id, set()).add(team_id)
+        return (
+            {team_id: frozenset(ids) for team_id, ids in team_members.items()},
+            {user_id: frozenset(ids) for user_id, ids in user_teams.items()},
+        )
+    
+    @api.model
+    def _get_team_member_ids(self, team_id):
+        """Cached member user ids of the given team"""
+        return self._get_membership_maps()[0].get(team_id, frozenset())
+    
+    @api.model
+    def _get_user_team_ids(self, user_id):
+        """Cached ids of the teams the given user belongs to"""
+        return self._get_membership_maps()[1].get(user_id, frozenset())
+    
+    # -------------------------------------------------------------------------
+    # CRUD OVERRIDES
+    # -------------------------------------------------------------------------
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Invalidate the membership cache when new teams get members"""
+        teams = super().create(vals_list)
+        if any(vals.get('member_ids') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return teams
+    
+    def write(self, vals):
+        """Invalidate the membership cache when members change"""
+        res = super().write(vals)
+        if 'member_ids' in vals:
+            self.env.registry.clear_cache()
+        return res
+    
+    def unlink(self):
+        """Invalidate the membership cache when teams disappear"""
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+    
     # -------------------------------------------------------------------------
     # COMPUTE METHODS
     # -------------------------------------------------------------------------
@@ -93,7 +153,7 @@ class MaintenanceTeam(models.Model):
     def _compute_member_count(self):
         """Compute number of team members"""
         for team in self:
-            team.member_count = len(team.member_ids)
+            team.member_count = len(self._get_team_member_ids(team.id))
     
     def _compute_counts(self):
         """Compute equipment and request counts"""
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class ResUsers(models.Model):
+    """Expose cached maintenance team membership on users
+    
+    Used by record rules (``user.maintenance_team_ids``) so rule evaluation
+    reads the registry cache instead of the relation table.
+    """
+    _inherit = 'res.users'
+
+    maintenance_team_ids = fields.Many2many(
+        'maintenance.team',
+        string='Maintenance Teams',
+        compute='_compute_maintenance_team_ids',
+        help="Maintenance teams this user is a member of"
+    )
+    
+    def _compute_maintenance_team_ids(self):
+        """Teams from the cached membership map"""
+        Team = self.env['maintenance.team']
+        for user in self:
+            user.maintenance_team_ids = Team.browse(sorted(Team._get_user_team_ids(user.id)))
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class SparePart(models.Model):
+    """Spare Part Model
+    
+    Parts kept in stock for repairs, linked to the equipment categories and
+    equipment they fit. Stock is decremented with row-level atomic updates
+    and reorder checks run as a batched scheduled job.
+    """
+    _name = 'maintenance.spare.part'
+    _description = 'Spare Part'
+    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _order = 'name'
+
+    # -------------------------------------------------------------------------
+    # BASIC FIELDS
+    # -------------------------------------------------------------------------
+    
+    name = fields.Char(
+        string='Part Name',
+        required=True,
+        tracking=True,
+        help="Name of the spare part (e.g., Hydraulic Seal Kit, V-Belt A42)"
+    )
+    
+    code = fields.Char(
+        string='Part Number',
+        required=True,
+        tracking=True,
+        help="Manufacturer or internal part number"
+    )
+    
+    active = fields.Boolean(
+        string='Active',
+        default=True
+    )
+    
+    category_ids = fields.Many2many(
+        'equipment.category',
+        'spare_part_category_rel',
+        'part_id',
+        'category_id',
+        string='Equipment Categories',
+        help="Equipment categories this part fits"
+    )
+    
+    equipment_ids = fields.Many2many(
+        'equipment.equipment',
+        'spare_part_equipment_rel',
+        'part_id',
+        'equipment_id',
+        string='Equipment',
+        help="Specific equipment this part fits"
+    )
+    
+    # -------------------------------------------------------------------------
+    # STOCK & REORDERING
+    # -------------------------------------------------------------------------
+    
+    qty_on_hand = fields.Float(
+        string='On Hand',
+        tracking=True,
+        help="Quantity currently in stock"
+    )
+    
+    reorder_point = fields.Float(
+        string='Reorder Point',
+        help="Flag the part for reordering when stock falls to this level"
+    )
+    
+    reorder_qty = fields.Float(
+        string='Reorder Quantity',
+        help="Suggested quantity to order"
+    )
+    
+    needs_reorder = fields.Boolean(
+        string='Needs Reorder',
+        readonly=True,
+        index=True,
+        help="Set by the scheduled reorder check"
+    )
+    
+    responsible_id = fields.Many2one(
+        'res.users',
+        string='Responsible',
+        default=lambda self: self.env.user,
+        help="User notified when the part needs reordering"
+    )
+    
+    # -------------------------------------------------------------------------
+    # COST
+    # -------------------------------------------------------------------------
+    
+    unit_cost = fields.Float(
+        string='Unit Cost',
+        digits='Product Price'
+    )
+    
+    currency_id = fields.Many2one(
+        'res.currency',
+        string='Currency',
+        default=lambda self: self.env.company.currency_id.id
+    )
+    
+    # -------------------------------------------------------------------------
+    # SQL CONSTRAINTS (ORM Best Practice)
+    # -------------------------------------------------------------------------
+    
+    _sql_constraints = [
+        ('code_unique', 'UNIQUE(code)', 'Part number must be unique!'),
+        ('qty_on_hand_positive', 'CHECK(qty_on_hand >= 0)', 'Stock on hand cannot be negative!'),
+    ]
+    
+    # -------------------------------------------------------------------------
+    # STOCK OPERATIONS
+    # -------------------------------------------------------------------------
+    
+    @api.model
+    def _decrement_stock(self, qty_by_part):
+        """Atomically take stock for {part id: quantity}
+        
+        One single-row UPDATE per part, in ascending id order so concurrent
+        consumers always lock rows in the same order. The stock check is part
+        of the UPDATE itself, so no row is read and locked beforehand.
+        """
+        self.flush_model(['qty_on_hand'])
+        for part_id in sorted(qty_by_part):
+            self.env.cr.execute("""
+                UPDATE maintenance_spare_part
+                   SET qty_on_hand = qty_on_hand - %s
+                 WHERE id = %s
+                   AND qty_on_hand >= %s
+             RETURNING id
+            """, [qty_by_part[part_id], part_id, qty_by_part[part_id]])
+            if not self.env.cr.fetchone():
+                part = self.browse(part_id)
+                raise UserError(_(
+                    "Not enough stock for %(part)s: %(qty)s requested.",
+                    part=part.display_name, qty=qty_by_part[part_id],
+                ))
+        self.browse(list(qty_by_part)).invalidate_recordset(['qty_on_hand'])
+    
+    @api.model
+    def _cron_check_reorder(self):
+        """Flag parts at or below their reorder point, set-wise
+        
+        Only rows whose flag changes are updated; newly flagged parts get a
+        to-do activity for their responsible user, created in one batch.
+        """
+        self.flush_model(['qty_on_hand', 'reorder_point', 'needs_reorder', 'active'])
+        self.env.cr.execute("""
+            UPDATE maintenance_spare_part
+               SET needs_reorder = (qty_on_hand <= reorder_point)
+             WHERE active
+               AND needs_reorder IS DISTINCT FROM (qty_on_hand <= reorder_point)
+         RETURNING id, needs_reorder
+        """)
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return
+        self.browse([row[0] for row in rows]).invalidate_recordset(['needs_reorder'])
+        to_reorder = self.browse([part_id for part_id, flag in rows if flag])
+        activity_type = self.env.ref('mail.mail_activity_data_todo', raise_if_not_found=False)
+        if not to_reorder or not activity_type:
+            return
+        res_model_id = self.env['ir.model']._get_id(self._name)
+        self.env['mail.activity'].create([{
+            'activity_type_id': activity_type.id,
+            'res_model_id': res_model_id,
+            'res_id': part.id,
+            'user_id': part.responsible_id.id or self.env.uid,
+            'summary': _("Reorder %(qty)s x %(part)s", qty=part.reorder_qty, part=part.name),
+            'date_deadline': fields.Date.context_today(self),
+        } for part in to_reorder])
+
+
+class MaintenancePartLine(models.Model):
+    """Parts Consumption Line
+    
+    Spare parts used by a maintenance request. Stock is taken when the
+    request is closed (or on demand) through SparePart._decrement_stock.
+    """
+    _name = 'maintenance.part.line'
+    _description = 'Maintenance Parts Consumption'
+    _order = 'request_id, id'
+
+    request_id = fields.Many2one(
+        'maintenance.request',
+        string='Maintenance Request',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    
+    part_id = fields.Many2one(
+        'maintenance.spare.part',
+        string='Spare Part',
+        required=True,
+        index=True,
+        ondelete='restrict'
+    )
+    
+    quantity = fields.Float(
+        string='Quantity',
+        default=1.0,
+        required=True
+    )
+    
+    unit_cost = fields.Float(
+        string='Unit Cost',
+        digits='Product Price'
+    )
+    
+    subtotal = fields.Float(
+        string='Subtotal',
+        digits='Product Price',
+        compute='_compute_subtotal',
+        store=True
+    )
+    
+    consumed = fields.Boolean(
+        string='Consumed',
+        readonly=True,
+        copy=False,
+        help="Stock has been taken for this line"
+    )
+    
+    _sql_constraints = [
+        ('quantity_positive', 'CHECK(quantity > 0)', 'Consumed quantity must be positive!'),
+    ]
+    
+    @api.depends('quantity', 'unit_cost')
+    def _compute_subtotal(self):
+        """Compute line cost"""
+        for line in self:
+            line.subtotal = line.quantity * line.unit_cost
+    
+    @api.onchange('part_id')
+    def _onchange_part_id(self):
+        """Default the unit cost from the part"""
+        if self.part_id:
+            self.unit_cost = self.part_id.unit_cost
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Lines start unconsumed: only _consume takes stock and flags them"""
+        if not self.env.su and any(vals.get('consumed') for vals in vals_list):
+            raise UserError(_("Parts are taken from stock when the request is closed."))
+        return super().create(vals_list)
+    
+    def write(self, vals):
+        """Consumed lines are frozen; the flag itself is set by _consume only"""
+        if 'consumed' in vals and not self.env.su:
+            raise UserError(_("Parts are taken from stock when the request is closed."))
+        if self.filtered('consumed') and {'part_id', 'quantity'}.intersection(vals):
+            raise UserError(_("Parts already taken from stock cannot be changed."))
+        return super().write(vals)
+    
+    def unlink(self):
+        """Consumed lines stay, so stock and costs remain accounted for"""
+        if self.filtered('consumed'):
+            raise UserError(_("Parts already taken from stock cannot be removed."))
+        return super().unlink()
+    
+    def _consume(self):
+        """Take stock for the lines not consumed yet"""
+        lines = self.filtered(lambda line: not line.consumed)
+        if not lines:
+            return
+        qty_by_part = defaultdict(float)
+        for line in lines:
+            qty_by_part[line.part_id.id] += line.quantity
+        self.env['maintenance.spare.part']._decrement_stock(qty_by_part)
+        lines.sudo().write({'consumed': True})
@@ -1,9 +1,19 @@
 # -*- coding: utf-8 -*-
 
+from collections import deque
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 from datetime import timedelta
 
+from ..tools import TtlCache, create_shared_generation, shared_generation, bump_shared_generation
+
+# Routing snapshot (open hours per center, thresholds, alternate graph) per database
+ROUTING_CACHE = TtlCache(ttl=30)
+
+# Sequence bumped when the routing inputs change, so every worker drops its snapshot
+ROUTING_GENERATION = 'gearguard_routing_cache_seq'
+
 
 class WorkCenter(models.Model):
     """Work Center Model
@@ -13,7 +23,7 @@ class WorkCenter(models.Model):
     """
     _name = 'maintenance.work.center'
     _description = 'Maintenance Work Center'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'gearguard.location.mixin']
     _order = 'sequence, name'
 
     # -------------------------------------------------------------------------
@@ -59,11 +69,6 @@ class WorkCenter(models.Model):
     # LOCATION & CAPACITY
     # -------------------------------------------------------------------------
     
-    location = fields.Char(
-        string='Location',
-        help="Physical location of the work center"
-    )
-    
     capacity = fields.Float(
         string='Capacity (Hours/Day)',
         default=8.0,
@@ -77,6 +82,13 @@ class WorkCenter(models.Model):
         help="Working hours calendar for this work center"
     )
     
+    max_open_hours = fields.Float(
+        string='Overload Threshold (Hours)',
+        help="When the open work queued on this center exceeds this many hours, "
+             "new requests are routed to the least-loaded alternate center. "
+             "0 disables rerouting."
+    )
+    
     # -------------------------------------------------------------------------
     # COST TRACKING (FROM MOCKUP)
     # -------------------------------------------------------------------------
@@ -209,6 +221,137 @@ class WorkCenter(models.Model):
             else:
                 center.utilization_rate = 0
     
+    # -------------------------------------------------------------------------
+    # OVERLOAD ROUTING
+    # -------------------------------------------------------------------------
+    
+    def init(self):
+        """Generation counter of the routing snapshots"""
+        super().init()
+        create_shared_generation(self.env.cr, ROUTING_GENERATION)
+    
+    @api.model
+    def _get_routing_snapshot(self):
+        """Open hours, thresholds and alternates of all centers, cached
+        
+        Built with three queries at most every ROUTING_CACHE TTL, and again
+        whenever the requests or centers change the routing inputs (in any
+        worker, through the ROUTING_GENERATION counter), so a routing
+        decision costs one sequence read on a cache hit.
+        """
+        cr = self.env.cr
+        key = (cr.dbname,)
+        generation = shared_generation(cr, ROUTING_GENERATION)
+        snapshot = ROUTING_CACHE.get(key, generation)
+        if snapshot is not None:
+            return snapshot
+        self.env['maintenance.request'].flush_model(['work_center_id', 'duration', 'is_closed', 'active'])
+        self.flush_model(['max_open_hours', 'active', 'alternate_workcenter_ids'])
+        cr.execute("""
+            SELECT work_center_id, SUM(COALESCE(duration, 0))
+              FROM maintenance_request
+             WHERE work_center_id IS NOT NULL
+               AND active
+               AND is_closed IS NOT TRUE
+          GROUP BY work_center_id
+        """)
+        load = dict(cr.fetchall())
+        cr.execute("SELECT id, COALESCE(max_open_hours, 0) FROM maintenance_work_center WHERE active")
+        limits = dict(cr.fetchall())
+        cr.execute("SELECT workcenter_id, alternate_id FROM work_center_alternate_rel ORDER BY alternate_id")
+        alternates = {}
+        for center_id, alternate_id in cr.fetchall():
+            alternates.setdefault(center_id, []).append(alternate_id)
+        snapshot = {'load': load, 'limits': limits, 'alternates': alternates}
+        ROUTING_CACHE.set(key, snapshot, generation=generation)
+        return snapshot
+    
+    @api.model
+    def _route_requests(self, targets):
+        """Centers that should receive new work, for a batch of requests
+        
+        :param targets: list of (work center id, hours) aimed at each center
+        :return: list of the chosen center ids, in the same order
+        
+        A target is kept unless it is over its threshold. Otherwise the
+        alternate graph is walked breadth-first (each center visited once,
+        so cycles are harmless) and the least-loaded center with room is
+        chosen; if none has room, the target is kept. The hours routed
+        earlier in the batch count against the centers, so a burst spreads
+        out. They are added to a private copy of the load: the shared
+        snapshot is never patched, so other workers and rolled-back
+        transactions cannot skew it.
+        """
+        snapshot = self._get_routing_snapshot()
+        load, limits = dict(snapshot['load']), snapshot['limits']
+        chosen_ids = []
+        for center_id, hours in targets:
+            def has_room(cid):
+                limit = limits.get(cid, 0.0)
+                return not limit or load.get(cid, 0.0) + hours <= limit
+            
+            chosen = center_id
+            if center_id in limits and not has_room(center_id):
+                best = None
+                seen = {center_id}
+                queue = deque(snapshot['alternates'].get(center_id, ()))
+                while queue:
+                    cid = queue.popleft()
+                    if cid in seen:
+                        continue
+                    seen.add(cid)
+                    if cid not in limits:
+                        continue
+                    if has_room(cid) and (best is None or load.get(cid, 0.0) < load.get(best, 0.0)):
+                        best = cid
+                    queue.extend(snapshot['alternates'].get(cid, ()))
+                chosen = best or center_id
+            load[chosen] = load.get(chosen, 0.0) + hours
+            chosen_ids.append(chosen)
+        return chosen_ids
+    
+    @api.model
+    def _invalidate_routing_cache(self):
+        """Drop this database's routing snapshot once the transaction commits
+        
+        Called whenever the open hours of a center, its threshold or its
+        alternates change, so the next routing decision sees the new load.
+        The shared generation is bumped after the commit, so no worker can
+        cache a snapshot missing the change under the new generation.
+        """
+        if self.env.cr.postcommit.data.get('gearguard.routing_cache_invalidated'):
+            return
+        self.env.cr.postcommit.data['gearguard.routing_cache_invalidated'] = True
+        dbname = self.env.cr.dbname
+        registry = self.env.registry
+        
+        def invalidate():
+            ROUTING_CACHE.clear(dbname)
+            with registry.cursor() as cr:
+                bump_shared_generation(cr, ROUTING_GENERATION)
+        self.env.cr.postcommit.add(invalidate)
+    
+    # -------------------------------------------------------------------------
+    # CRUD OVERRIDES
+    # -------------------------------------------------------------------------
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """New centers (and their alternates) take part in routing"""
+        self._invalidate_routing_cache()
+        return super().create(vals_list)
+    
+    def write(self, vals):
+        """Routing inputs changed: rebuild the snapshot on next use"""
+        if {'max_open_hours', 'alternate_workcenter_ids', 'active'}.intersection(vals):
+            self._invalidate_routing_cache()
+        return super().write(vals)
+    
+    def unlink(self):
+        """Deleted centers leave the routing graph"""
+        self._invalidate_routing_cache()
+        return super().unlink()
+    
     # -------------------------------------------------------------------------
     # ACTIONS
     # -------------------------------------------------------------------------
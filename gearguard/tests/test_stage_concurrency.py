@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, tagged
+from odoo.tests.common import get_db_name
+
+# Parallel stage movers, each dragging two requests on different equipment
+MOVERS = 50
+EQUIPMENT_COUNT = 5
+TIMEOUT = 120
+
+
+@tagged('post_install', '-at_install')
+class TestStageConcurrency(BaseCase):
+    """Concurrent Kanban Stage Moves
+    
+    Every mover runs in its own thread with its own cursor and commits, as
+    parallel kanban drops do. Half of them scrap requests sharing equipment.
+    The movers only write their own requests (the equipment side effects
+    are queued), so none of them may fail, neither on a deadlock nor on a
+    serialization error; the queued jobs then scrap every equipment once.
+    """
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.registry = Registry(get_db_name())
+        with cls.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            team = env['maintenance.team'].create({'name': 'Concurrency Team'})
+            equipment = env['equipment.equipment'].create([{
+                'name': f'Concurrency Press {index}',
+                'category_id': env.ref('gearguard.category_machinery').id,
+                'maintenance_team_id': team.id,
+            } for index in range(EQUIPMENT_COUNT)])
+            requests = env['maintenance.request'].create([{
+                'name': f'Concurrency Request {mover}/{offset}',
+                'request_type': 'corrective',
+                'equipment_id': equipment[(mover + offset) % EQUIPMENT_COUNT].id,
+                'maintenance_team_id': team.id,
+                'stage_id': env.ref('gearguard.stage_new').id,
+            } for mover in range(MOVERS) for offset in range(2)])
+            cls.team_id = team.id
+            cls.equipment_ids = equipment.ids
+            cls.request_ids = requests.ids
+            cls.scrap_stage_id = env.ref('gearguard.stage_scrap').id
+            cls.progress_stage_id = env.ref('gearguard.stage_in_progress').id
+        cls.addClassCleanup(cls._cleanup)
+    
+    @classmethod
+    def _cleanup(cls):
+        with cls.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['maintenance.request'].browse(cls.request_ids).unlink()
+            env['equipment.equipment'].browse(cls.equipment_ids).unlink()
+            env['maintenance.team'].browse(cls.team_id).unlink()
+            cr.execute("DELETE FROM gearguard_job WHERE model_name = 'equipment.equipment'"
+                       " AND (res_ids->>0)::int IN %s", [tuple(cls.equipment_ids)])
+            cr.execute("DELETE FROM mail_message WHERE model = 'equipment.equipment' AND res_id IN %s",
+                       [tuple(cls.equipment_ids)])
+            cr.execute("DELETE FROM gearguard_sync_tombstone WHERE model_name = 'maintenance.request'"
+                       " AND res_id IN %s", [tuple(cls.request_ids)])
+    
+    def _mover_batches(self):
+        """(request ids, stage id) per mover: even movers scrap, odd ones start work
+        
+        Odd movers hold their requests in reverse equipment order, so the
+        batches cross each other.
+        """
+        batches = []
+        for mover in range(MOVERS):
+            request_ids = self.request_ids[2 * mover:2 * mover + 2]
+            if mover % 2:
+                request_ids = request_ids[::-1]
+            stage_id = self.progress_stage_id if mover % 2 else self.scrap_stage_id
+            batches.append((request_ids, stage_id))
+        return batches
+    
+    def test_parallel_stage_moves(self):
+        """50 parallel movers: no failed mover, no lost update, one scrap per equipment"""
+        batches = self._mover_batches()
+        barrier = threading.Barrier(MOVERS)
+        errors = []
+        
+        def move(request_ids, stage_id):
+            try:
+                with self.registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    barrier.wait(timeout=TIMEOUT)
+                    env['maintenance.request'].browse(request_ids).write({'stage_id': stage_id})
+            except Exception as e:
+                errors.append(e)
+                barrier.abort()
+        
+        threads = [threading.Thread(target=move, args=batch) for batch in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(TIMEOUT)
+        self.assertFalse([thread for thread in threads if thread.is_alive()], "Stage movers are stuck")
+        self.assertFalse(errors, "Stage movers failed: %s" % errors)
+        
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            # No lost update: every request reached its stage, with one logged move
+            for request_ids, stage_id in batches:
+                requests = env['maintenance.request'].browse(request_ids)
+                self.assertEqual(requests.stage_id.ids, [stage_id])
+            cr.execute("""
+                SELECT request_id, COUNT(*)
+                  FROM maintenance_stage_transition
+                 WHERE request_id IN %s
+                   AND from_stage_id IS NOT NULL
+              GROUP BY request_id
+            """, [tuple(self.request_ids)])
+            moves = dict(cr.fetchall())
+            self.assertEqual(set(moves), set(self.request_ids))
+            self.assertEqual(set(moves.values()), {1}, "A stage move was logged twice")
+            
+            jobs = env['gearguard.job'].search([
+                ('model_name', '=', 'equipment.equipment'),
+                ('method_name', '=', '_apply_request_stage'),
+                ('state', '=', 'pending'),
+            ]).filtered(lambda job: set(job.res_ids or []) <= set(self.equipment_ids))
+            self.assertTrue(jobs, "The equipment side effects were not queued")
+        
+        # Drain the queued side effects, one transaction per job
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            for job in env['gearguard.job'].browse(jobs.ids):
+                job._run()
+                cr.commit()
+            self.assertEqual(set(env['gearguard.job'].browse(jobs.ids).mapped('state')), {'done'})
+            
+            # Every equipment got scrapped exactly once, with a single notice
+            equipment = env['equipment.equipment'].browse(self.equipment_ids)
+            self.assertTrue(all(equipment.mapped('is_scrap')))
+            self.assertTrue(all(equipment.mapped('last_maintenance_date')))
+            notices = env['mail.message'].search_count([
+                ('model', '=', 'equipment.equipment'),
+                ('res_id', 'in', self.equipment_ids),
+                ('body', 'ilike', 'marked as SCRAP'),
+            ])
+            self.assertEqual(notices, len(self.equipment_ids))
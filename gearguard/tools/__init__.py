@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from .ttl_cache import TtlCache, create_shared_generation, shared_generation, bump_shared_generation
+from . import reliability
+from .replica import reporting_cursor, reporting_env
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import logging
+
+from odoo import api, sql_db
+
+from .ttl_cache import TtlCache
+
+_logger = logging.getLogger(__name__)
+
+# Replication lag (seconds) tolerated when ``gearguard.replica_max_lag`` is unset
+DEFAULT_MAX_LAG = 30
+
+# Replica health per (database, uri), re-checked every few seconds
+HEALTH_CACHE = TtlCache(ttl=10)
+
+
+def _replica_lag(cr):
+    """Seconds the replica is behind its primary (0 on a primary or when caught up)"""
+    cr.execute("""
+        SELECT CASE
+                   WHEN NOT pg_is_in_recovery() THEN 0
+                   WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                   ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+               END
+    """)
+    return float(cr.fetchone()[0])
+
+
+def _open_replica_cursor(dbname, uri, max_lag):
+    """Cursor on the replica, or None when it is unreachable or lagging"""
+    key = (dbname, uri)
+    healthy = HEALTH_CACHE.get(key)
+    if healthy is False:
+        return None
+    try:
+        cr = sql_db.db_connect(uri, allow_uri=True).cursor()
+    except Exception:
+        _logger.warning("GearGuard reporting replica unreachable, using the primary", exc_info=True)
+        HEALTH_CACHE.set(key, False)
+        return None
+    if healthy is None:
+        try:
+            lag = _replica_lag(cr)
+        except Exception:
+            _logger.warning("Could not read the replication lag, using the primary", exc_info=True)
+            lag = None
+        if lag is None or lag > max_lag:
+            if lag is not None:
+                _logger.info("GearGuard reporting replica lags %.1fs (> %ss), using the primary", lag, max_lag)
+            cr.close()
+            HEALTH_CACHE.set(key, False)
+            return None
+        HEALTH_CACHE.set(key, True)
+    return cr
+
+
+def reporting_cursor(env):
+    """New cursor on the reporting replica, or None to read on the primary
+
+    A cursor is returned when ``gearguard.replica_uri`` points to a
+    secondary PostgreSQL server (streaming replica or a copy of the
+    database) that is reachable and lags at most
+    ``gearguard.replica_max_lag`` seconds. The replica database must bear
+    the same name as the primary one. The caller closes the cursor.
+    """
+    if env.context.get('gearguard_no_replica'):
+        return None
+    params = env['ir.config_parameter'].sudo()
+    uri = params.get_param('gearguard.replica_uri')
+    if not uri:
+        return None
+    max_lag = float(params.get_param('gearguard.replica_max_lag', DEFAULT_MAX_LAG))
+    return _open_replica_cursor(env.cr.dbname, uri, max_lag)
+
+
+@contextlib.contextmanager
+def reporting_env(env):
+    """Environment for read-only reporting queries
+
+    Yields an environment on a fresh replica cursor (see
+    :func:`reporting_cursor`), or ``env`` itself when reads must stay on
+    the primary. Anything read must be materialized inside the block.
+    """
+    cr = reporting_cursor(env)
+    if cr is None:
+        yield env
+        return
+    try:
+        yield api.Environment(cr, env.uid, dict(env.context, gearguard_no_replica=True))
+    finally:
+        cr.close()
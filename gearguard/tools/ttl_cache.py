@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+
+def create_shared_generation(cr, sequence):
+    """Create the sequence backing a shared generation counter"""
+    cr.execute(f'CREATE SEQUENCE IF NOT EXISTS "{sequence}"')
+
+
+def shared_generation(cr, sequence):
+    """Current value of a generation counter shared by all workers
+    
+    Generations are PostgreSQL sequences: reading or bumping them takes no
+    row lock and is not transactional, so writers never contend on them.
+    """
+    cr.execute(f'SELECT last_value FROM "{sequence}"')
+    return cr.fetchone()[0]
+
+
+def bump_shared_generation(cr, sequence):
+    """Invalidate the entries cached under ``sequence`` in every worker"""
+    cr.execute("SELECT nextval(%s)", [sequence])
+
+
+class TtlCache:
+    """Small per-process cache whose entries expire after a time-to-live
+    
+    Keys are tuples whose first element is the database name, so a whole
+    database can be invalidated at once with :meth:`clear`. Entries stored
+    with a ``generation`` (see :func:`shared_generation`) are only returned
+    for that same generation, which lets other workers invalidate them.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, generation=None):
+        """Return the cached value, or None if missing, expired or of another generation"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic() or entry[2] != generation:
+            return None
+        return entry[1]
+
+    def superseded(self, key, generation):
+        """Whether ``key`` was last cached under another generation than ``generation``"""
+        entry = self._data.get(key)
+        return entry is not None and entry[2] != generation
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store ``value`` for ``ttl`` seconds (defaults to the cache TTL)"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value, generation)
+
+    def clear(self, dbname=None):
+        """Drop all entries, or only those of ``dbname``"""
+        with self._lock:
+            if dbname is None:
+                self._data.clear()
+            else:
+                for key in [key for key in self._data if key[0] == dbname]:
+                    del self._data[key]